@@ -55,27 +55,33 @@ g = Graph()
 mv = Namespace("http://example.org/myvocab/")
 g.bind("mv", mv)
 
-# Iterate over DataFrame rows and convert each row to RDF triples
-for index, row in df.iterrows():
+# Convert each row to RDF triples, collecting them so that they are added to
+# the graph in a single call.
+quads = []
+for row in df.itertuples(index=False):
     # Unique identifier for each observation
-    observation_uri = URIRef(f"{repo_uri}{row['CommitHash']}/{row['MethodUsed']}")
+    observation_uri = URIRef(f"{repo_uri}{row.CommitHash}/{row.MethodUsed}")
 
     # Reference to the commit and the method
     # Commit URIs are of the form: https://github.com/spring-projects/spring-petclinic/commit/516722647ae474746a84c197127e323135907d57
-    commit_uri = URIRef(f"{repo_uri}commit/{row['CommitHash']}")
-    method_uri = mv[row["MethodUsed"]]
+    commit_uri = URIRef(f"{repo_uri}commit/{row.CommitHash}")
+    method_uri = mv[row.MethodUsed]
 
     # Define the observation as an instance of a collection effort
-    g.add((observation_uri, RDF.type, mv.Observation))
-    g.add((observation_uri, mv.commit, commit_uri))
-    g.add((observation_uri, mv.methodUsed, method_uri))
-    g.add(
-        (
-            observation_uri,
-            mv.testFileCount,
-            Literal(row["TestFileCount"], datatype=XSD.integer),
-        )
+    quads.extend(
+        [
+            (observation_uri, RDF.type, mv.Observation, g),
+            (observation_uri, mv.commit, commit_uri, g),
+            (observation_uri, mv.methodUsed, method_uri, g),
+            (
+                observation_uri,
+                mv.testFileCount,
+                Literal(row.TestFileCount, datatype=XSD.integer),
+                g,
+            ),
+        ]
     )
+g.addN(quads)
 
 # Serialize the graph to a Turtle file
 g.serialize(f"{path_to_data_folder}/example_commit_data.ttl", format="turtle")
@@ -4,36 +4,69 @@ Mostly generated by openai's ChatGPT 4 with some minor additions.
 This code demonstrates how the programming language info can be obtained from
 github's APIs for a specific project.
 """
+from datetime import timedelta
 from loguru import logger
 import os
-import requests
+from requests.adapters import HTTPAdapter
+from requests_cache import CachedSession
+from urllib3.util import Retry
 
-def get_github_repository_languages(token, repository_owner, repository_name):
-    # GraphQL endpoint
-    url = "https://api.github.com/graphql"
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-
-    # GraphQL query to retrieve repository languages
-    query = """
-    query($owner: String!, $name: String!) {
-      repository(owner: $owner, name: $name) {
-        languages(first: 10, orderBy: {field: SIZE, direction: DESC}) {
-          edges {
-            node {
-              name
-            }
-            size
-          }
+from utils.github_client import GitHubClient
+
+# A single session keeps the connection to the GitHub API open between
+# requests. Requests that hit a server error are retried with an exponential
+# backoff; rate limited requests are handled by the GitHubClient below.
+# The GraphQL API doesn't support ETags, so the responses (including those to
+# the POSTed queries) are cached on disk for a day instead.
+session = CachedSession(
+    "github_graphql_cache",
+    backend="sqlite",
+    allowable_methods=("GET", "POST"),
+    expire_after=timedelta(days=1),
+)
+session.mount(
+    "https://",
+    HTTPAdapter(
+        max_retries=Retry(
+            total=5,
+            backoff_factor=1,
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods=None,  # the GraphQL queries are sent as POSTs
+        )
+    ),
+)
+client = GitHubClient(session)
+
+# GraphQL endpoint
+GRAPHQL_URL = "https://api.github.com/graphql"
+
+# GraphQL query to retrieve repository languages
+LANGUAGES_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    languages(first: 10, orderBy: {field: SIZE, direction: DESC}) {
+      edges {
+        node {
+          name
         }
+        size
       }
     }
-    """
+  }
+}
+"""
 
+
+def get_github_repository_languages(token, repository_owner, repository_name):
+    # requests sets the JSON Content-Type header itself
+    headers = {"Authorization": f"Bearer {token}"}
     variables = {"owner": repository_owner, "name": repository_name}
 
     # Sending the request to the GitHub GraphQL API
-    response = requests.post(
-        url, headers=headers, json={"query": query, "variables": variables}
+    response = client.post(
+        GRAPHQL_URL,
+        headers=headers,
+        json={"query": LANGUAGES_QUERY, "variables": variables},
     )
     if response.status_code == 200:
         # Parsing the response
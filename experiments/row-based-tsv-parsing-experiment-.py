@@ -6,28 +6,39 @@ to only obtain the last column in the dataframe in tsv_parsing_experiment.py
 but that didn't work. This code is the result.
 """
 
+import csv
+
 import pandas as pd
 
 # Define the path to your TSV file
 file_path = "project_repos_from_jos_2024-feb-22.tsv"
 
-# First, read the data line by line. Store records with only 1 column in the 3rd column;
-# Store records with 3 columns directly.
-df = pd.DataFrame()
-with open(file_path, "r") as f:
-    for line in f:
-        parsed_line = line.strip().split("\t")
-        if len(parsed_line) == 1:
-            data = [(pd.NA, pd.NA, parsed_line[0])]
-            temp_df = pd.DataFrame.from_records(data)
-            df = pd.concat([df, temp_df], ignore_index=True)
-        elif len(parsed_line) == 3:
-            df = pd.concat([df, pd.DataFrame([tuple(parsed_line)])], ignore_index=True)
-        else:
-            raise ValueError("Unexpected number of columns in the file.")
-
-# Add column names, these will do for now
-df.columns = ["projectref", "nlnetpage", "repourl"]
+# Let pandas' C parser read the file; records with only 1 column are padded
+# with missing values. Quoting is disabled so that each tab separated field is
+# read verbatim.
+columns = ["projectref", "nlnetpage", "repourl"]
+df = pd.read_csv(
+    file_path,
+    sep="\t",
+    header=None,
+    names=columns,
+    dtype="string",
+    engine="c",
+    quoting=csv.QUOTE_NONE,
+    keep_default_na=False,
+)
+df = df.apply(lambda column: column.str.strip())
+
+# Records with only 1 column hold a repo URL, so move it to the 3rd column.
+# Records with 3 columns are used directly.
+populated = df.fillna("").ne("")
+single_column = populated["projectref"] & ~populated[["nlnetpage", "repourl"]].any(
+    axis=1
+)
+if not (single_column | populated.all(axis=1)).all():
+    raise ValueError("Unexpected number of columns in the file.")
+df.loc[single_column, "repourl"] = df.loc[single_column, "projectref"]
+df.loc[single_column, ["projectref", "nlnetpage"]] = pd.NA
 
 # For projects with several code repos, copy the project ref and NLnet page info
 # from the previous record which has these details.
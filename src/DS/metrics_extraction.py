@@ -4,19 +4,36 @@ relevant metrics and perform various analyses. The script processes both test
 files and general Python code files, extracting metrics such as:
 
 - Number of test cases (functions starting with 'test_')
-- Number of assertions (using 'assert' statements)
+- Number of assertions (using 'assert' statements or the assertion methods
+of `unittest`, e.g. `self.assertEqual`)
 - Presence of setup and teardown methods (e.g., setUp, tearDown)
 - Complexity of the test file (measured by counting functions and branches)
 - Cyclomatic complexity of the code : sum of all functions' complexities where
 cyclomatic complexity of that function, is a measure of how many independent
 paths or 'decision points' exist in the function. Cyclomatic complexity
 generally increases with the number of branches, loops, and conditional
-statements in the function.
-- Lines of code (LOC) : Counts lines by splitting the file content into lines.
-- Number of functions : Counts each function encountered.
+statements in the function. It is counted in the same pass over the AST as
+the other metrics: one per function plus one per decision point (`if`/`elif`,
+loops, `try` and each `except` clause).
+- Lines of code (LOC) : Counts the lines in the file content. This is
+reported even for files which can't be parsed, e.g. due to a syntax error.
+- Number of functions : Counts each function encountered, including nested
+functions and methods.
+
+The cyclomatic complexity and number of functions used to be worked out with
+the `mccabe` package, and give the same values for functions and methods,
+with two deliberate differences:
+- A function nested in another function (or in a class within one) counts as
+a function of its own. `mccabe` included it in the function containing it,
+so the complexity is the same but the number of functions was lower.
+- A branch or loop outside any function adds 1 per decision point, and isn't
+counted as a function. `mccabe` counted each such statement at the top level
+of the module as a function, with a complexity of 1 plus its decision points.
 
 The script saves the results of these analyses to a specified CSV file,
-updating the file in batches as multiple files are processed.
+appending them to the file in batches as multiple files are processed.
+Alternatively, with `--output-format parquet`, each batch is written as a
+Parquet file in the output directory.
 
 Notes about the input and output files of this script:
 - Input file : This is the output of the Supabase database after running the
@@ -25,7 +42,9 @@ path` and 'guessed_language' amongst other columns like `hosting_provider` and
 `repo_name`.
 - output file: is a dataframe which contains information about testing
 techniques and code complexity. Some columns are `num_assertions`,
-`cyclomatic_complexity`, and `lines_of_code`.
+`cyclomatic_complexity`, and `lines_of_code`. For Parquet output it is a
+directory of files which can be read back as one dataframe with
+`pd.read_parquet`.
 
 ### Usage:
 To run the script, specify the input and output CSV file paths using the
@@ -40,17 +59,108 @@ Example:
 
 import argparse
 import ast
+import hashlib
+import os
+import shelve
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-from mccabe import PathGraphingAstVisitor
+import pyarrow as pa
+import pyarrow.parquet as pq
 from loguru import logger
 from pathlib import Path
 
 from utils.git_utils import get_working_directory_or_git_root
 
 BATCH_SIZE = 100  # Number of files to process before saving to disk
+INPUT_CHUNK_SIZE = 50_000  # Number of rows of the input file to read at a time
+ANALYSIS_CACHE_SIZE = 10_000  # Number of results each process keeps in memory
+
+# Version of the analysis stored in the results cache (see `--cache`). Bump it
+# whenever a change to the analysis changes the results, so the results cached
+# by an earlier version are analysed again rather than reused.
+CACHE_VERSION = 2
+
+# The most recent analysis results of each (worker) process, keyed by a hash
+# of the file content and whether the file looks like a test file. Cloned
+# repositories often contain identical copies of files (e.g. vendored
+# libraries), which are then only parsed once.
+ANALYSIS_CACHE = OrderedDict()
+
+# Columns of the output file, in the order they are written
+OUTPUT_COLUMNS = [
+    "file_path",
+    "num_test_cases",
+    "num_assertions",
+    "has_setup",
+    "has_teardown",
+    "complexity",
+    "cyclomatic_complexity",
+    "lines_of_code",
+    "num_functions",
+    "analysis_error",
+]
+
+# Types of the output columns when they are written to Parquet
+PARQUET_SCHEMA = pa.schema(
+    [
+        ("file_path", pa.string()),
+        ("num_test_cases", pa.int64()),
+        ("num_assertions", pa.int64()),
+        ("has_setup", pa.bool_()),
+        ("has_teardown", pa.bool_()),
+        ("complexity", pa.int64()),
+        ("cyclomatic_complexity", pa.int64()),
+        ("lines_of_code", pa.int64()),
+        ("num_functions", pa.int64()),
+        ("analysis_error", pa.string()),
+    ]
+)
+
+# Metrics that count occurrences, which are -1 rather than 0 if none are found
+COUNTED_METRICS = (
+    "num_test_cases",
+    "num_assertions",
+    "complexity",
+    "cyclomatic_complexity",
+    "num_functions",
+)
+
+# Endings of the names of test modules, other than those starting with 'test'
+TEST_MODULE_SUFFIXES = ("_test.py", "_tests.py", "conftest.py")
+
+# Names of the test functions and of the fixture methods of `unittest`
+TEST_PREFIX = "test_"
+SETUP_METHOD = "setUp"
+TEARDOWN_METHOD = "tearDown"
+ASSERT_METHOD_PREFIX = "assert"
+
+# Node types are compared by identity (`type(node) is ...` or membership of a
+# set of types) rather than with `isinstance`, as the AST node classes are
+# never subclassed and this is the innermost loop of the analysis.
+FUNCTION_TYPES = frozenset({ast.FunctionDef, ast.AsyncFunctionDef})
+
+# Statements that add an independent path through the code, i.e. the decision
+# points counted by McCabe's cyclomatic complexity. As in `mccabe`, a `try`
+# adds one path and each of its `except` clauses adds another.
+DECISION_POINTS = frozenset(
+    {ast.If, ast.For, ast.AsyncFor, ast.While, ast.Try, ast.ExceptHandler}
+)
+
+# Fields of a node that hold statements: bodies, `else` and `finally` blocks,
+# `except` handlers and `match` cases
+STATEMENT_FIELDS = ("body", "orelse", "finalbody", "handlers", "cases")
+
+
+class ParseError(ValueError):
+    """
+    Raised when a file is read but can't be parsed, e.g. due to a syntax
+    error. The lines of the file are still counted.
+    """
 
-# Configure logger
-logger.add("metrics_extraction.log", rotation="500 MB", level="INFO")
+    def __init__(self, message, lines_of_code):
+        super().__init__(message)
+        self.lines_of_code = lines_of_code
 
 
 def parse_args():
@@ -72,336 +182,603 @@ def parse_args():
     parser.add_argument(
         "--output",
         type=str,
-        default=Path(
-            get_working_directory_or_git_root()
-            / "data"
-            / "test_metrics_df_guesslang.csv"
-        ),
-        help="Path to the output CSV file with data on testing techniques and "
-        "code complexity.",
+        default=None,
+        help="Path to the output CSV file (or directory, for Parquet output) "
+        "with data on testing techniques and code complexity. Defaults to "
+        "data/test_metrics_df_guesslang.csv, or the directory "
+        "data/test_metrics_df_guesslang/ for Parquet output.",
+    )
+
+    parser.add_argument(
+        "--cache",
+        type=str,
+        default=Path(get_working_directory_or_git_root() / "data" / "metrics_cache"),
+        help="Path to the cache of the analysis results of each file, which "
+        "is reused for files that have not changed since they were analysed.",
     )
 
-    return parser.parse_args()
+    parser.add_argument(
+        "--output-format",
+        choices=["csv", "parquet"],
+        default="csv",
+        help="Format of the output. CSV results are appended to a single file; "
+        "Parquet results are written as one file per batch in the output "
+        "directory.",
+    )
 
+    args = parser.parse_args()
+    if args.output is None:
+        # The Parquet output is a directory, so it mustn't take the CSV file's
+        # name (a later CSV run would then try to append to the directory)
+        output_name = {
+            "csv": "test_metrics_df_guesslang.csv",
+            "parquet": "test_metrics_df_guesslang",
+        }[args.output_format]
+        args.output = get_working_directory_or_git_root() / "data" / output_name
 
-def read_and_parse_file(file_path):
+    return args
+
+
+def read_file(file_path):
     """
-    Reads and parses a Python file into an AST.
+    Reads a Python file.
+
+    The file is read as bytes: `ast.parse` decodes them itself (honouring any
+    encoding declaration) and the lines can be counted without decoding.
 
     Args:
         file_path (str): The path to the Python file.
 
     Returns:
-        tuple: A tuple containing the AST tree and the file content, or
-        None if there's an error.
+        bytes: The raw (undecoded) file content, or None if there's an error.
     """
-    logger.debug(f"Attempting to read and parse: {file_path}")
+    logger.debug(f"Attempting to read: {file_path}")
     if not file_path.endswith(".py"):
         logger.debug(f"Skipping non-python file {file_path}")
         return None
 
     try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            content = file.read()
-            tree = ast.parse(content, filename=file_path)
-            logger.debug(f"Successfully parsed file: {file_path}")
-            return tree, content
+        with open(file_path, "rb") as file:
+            return file.read()
+    except FileNotFoundError as e:
+        logger.error(f"File not found: {file_path}: {e}")
+    except Exception as e:
+        logger.error(f"Unexpected error reading file {file_path}: {e}")
+
+    return None
+
+
+def parse_content(content, file_path):
+    """
+    Parses the content of a Python file into an AST.
+
+    Args:
+        content (bytes): The content of the file.
+        file_path (str): The path to the Python file, used in error messages.
+
+    Returns:
+        ast.Module: The AST tree, or None if there's an error.
+    """
+    try:
+        tree = ast.parse(content, filename=file_path)
+        logger.debug(f"Successfully parsed file: {file_path}")
+        return tree
     except SyntaxError as e:
         logger.error(f"Syntax error in file {file_path}: {e}")
     except UnicodeDecodeError as e:
         logger.error(f"Unicode decode error in file {file_path}: {e}")
-    except FileNotFoundError as e:
-        logger.error(f"File not found: {file_path}: {e}")
     except Exception as e:
         logger.error(f"Unexpected error processing file {file_path}: {e}")
 
     return None
 
 
-def get_parsed_arg(file_path):
+def iter_statements(tree):
     """
-    Get AST tree and content from file, raising ValueError if parsing fails.
+    Yields every statement in an AST, walking it with an explicit stack.
+
+    Unlike `ast.walk`, only the statement fields of each node are followed, so
+    the expressions (which make up most of the tree) are never visited. Every
+    node that the analysis counts is a statement or an `except` handler, so
+    nothing is missed.
+
+    Args:
+        tree (ast.AST): The parsed file, or any node with a body, such as a
+        function.
+
+    Yields:
+        ast.AST: The statements, `except` handlers and `match` cases.
     """
-    parsed_file = read_and_parse_file(file_path)
-    if parsed_file is None:
-        logger.error(f"Failed to parse file: {file_path}")
-        raise ValueError(f"Could not parse file: {file_path}")
-    return parsed_file
+    stack = list(reversed(tree.body))
+    while stack:
+        node = stack.pop()
+        yield node
+        for field in STATEMENT_FIELDS:
+            children = getattr(node, field, None)
+            if children:
+                stack.extend(reversed(children))
+
+
+def count_lines(content):
+    """
+    Counts the lines in the content of a file.
+
+    The newlines are counted rather than splitting the content into a list of
+    lines. A last line without a trailing newline still counts as a line.
+    This gives the same count as `str.splitlines` for "\n" and "\r\n" line
+    endings, but unlike it doesn't treat a lone "\r" or a form feed as a
+    line break.
+
+    Args:
+        content (bytes): The content of the file.
+
+    Returns:
+        int: The number of lines.
+    """
+    return content.count(b"\n") + (1 if content and not content.endswith(b"\n") else 0)
 
 
-def analyse_test_file(file_path):
+def looks_like_test_file(file_path):
     """
-    Analyses a Python test file to extract the number of test cases,
-    assertions, presence of setup and teardown methods, and the complexity
-    of the test file.
+    Checks whether the path of a file suggests that it holds tests.
+
+    That is, the file is in a test directory (e.g. `test/`, `tests/`,
+    `testing/`, `unit_tests/`) or is named like a test module (`test*.py`,
+    `*_test.py`, `*_tests.py` or `conftest.py`). Paths which merely contain
+    'test' elsewhere, such as `latest.py` or `attestation/`, don't count.
 
     Args:
-        file_path (str): The path to the test file.
+        file_path (str): The path to the Python file.
 
     Returns:
-           dict: A dictionary containing the analysis results.
+        bool: True if the file may contain tests.
     """
-    logger.info(f"Starting analysis of test file: {file_path}")
+    path = file_path.lower()
+    # Cheap check first, which rules out most files
+    if "test" not in path:
+        return False
+
+    *directories, name = path.split("/")
+    if name.startswith("test") or name.endswith(TEST_MODULE_SUFFIXES):
+        return True
+    return any(
+        directory.startswith("test") or directory.endswith("tests")
+        for directory in directories
+    )
+
+
+def is_assert_method_call(node):
+    """
+    Checks whether an expression is a call of an assertion method, such as
+    `self.assertEqual(...)` in a `unittest` test case.
+
+    Args:
+        node (ast.expr): The expression.
+
+    Returns:
+        bool: True if the expression calls a method whose name starts with
+        'assert'.
+    """
+    if type(node) is not ast.Call:
+        return False
+    func = node.func
+    return type(func) is ast.Attribute and func.attr.startswith(ASSERT_METHOD_PREFIX)
+
 
+def analyse_file(file_path):
+    """
+    Analyses a Python file to extract both the test metrics (the number of
+    test cases, assertions, presence of setup and teardown methods, and the
+    complexity of the tests) and the code metrics (cyclomatic complexity,
+    lines of code, and the number of functions).
+
+    The file is read and parsed once, and a single walk over the statements in
+    the AST collects every metric. The test metrics are only collected for
+    files whose path looks like a test file (see `looks_like_test_file`).
+    Files with the same content as one analysed recently aren't parsed again
+    (see `ANALYSIS_CACHE`).
+
+    Args:
+        file_path (str): The path to the Python file.
+
+    Returns:
+        dict: A dictionary containing the analysis results.
+
+    Raises:
+        ValueError: If the file can't be read.
+        ParseError: If the file can't be parsed.
+    """
+    logger.debug(f"Starting analysis of file: {file_path}")
+
+    content = read_file(file_path)
+    if content is None:
+        logger.error(f"Failed to read file: {file_path}")
+        raise ValueError(f"Could not parse file: {file_path}")
+
+    is_test_file = looks_like_test_file(file_path)
+    cache_key = (hashlib.blake2b(content, digest_size=16).digest(), is_test_file)
+    if cache_key in ANALYSIS_CACHE:
+        ANALYSIS_CACHE.move_to_end(cache_key)
+        logger.debug(f"Reusing the analysis of identical content for {file_path}")
+        return dict(ANALYSIS_CACHE[cache_key])
+
+    tree = parse_content(content, file_path)
+    if tree is None:
+        logger.error(f"Failed to parse file: {file_path}")
+        raise ParseError(f"Could not parse file: {file_path}", count_lines(content))
+
+    # The counts start at 0 and are incremented as things are found; any
+    # that are still 0 at the end are reported as -1 (none found).
     result = {
-        "num_test_cases": -1,
-        "num_assertions": -1,
+        "num_test_cases": 0,
+        "num_assertions": 0,
         "has_setup": False,
         "has_teardown": False,
-        "complexity": -1,
+        "complexity": 0,
+        "cyclomatic_complexity": 0,
+        "lines_of_code": -1,
+        "num_functions": 0,
     }
 
-    # Dictionary to collect debug information
-    debug_info = {
-        "test_cases": [],
-        "if_locations": [],
-        "assertion_locations": [],
-    }
+    # Names of the test cases, for the debug log
+    test_cases = []
 
-    tree, _ = get_parsed_arg(file_path)
+    result["lines_of_code"] = count_lines(content)
 
-    # Initialise counters to 1 on first find (since they start at -1)
-    for node in ast.walk(tree):  # Walks through all nodes in the AST
-        if isinstance(node, ast.FunctionDef):
-            if node.name.startswith("test_"):
-                # For first test case, set to 1; for subsequent ones, increment
-                result["num_test_cases"] = (
-                    result["num_test_cases"] + 1 if result["num_test_cases"] >= 0 else 1
-                )
+    for node in iter_statements(tree):  # Walks through all statements
+        node_type = type(node)
+        if node_type in FUNCTION_TYPES:
+            # Every function counts towards the number of functions and adds
+            # a base complexity of 1 to the cyclomatic complexity.
+            result["num_functions"] += 1
+            result["cyclomatic_complexity"] += 1
+
+        elif node_type in DECISION_POINTS:
+            # Each decision point adds an independent path
+            result["cyclomatic_complexity"] += 1
+
+        if is_test_file and node_type is ast.FunctionDef:
+            name = node.name
+            if name.startswith(TEST_PREFIX):
+                result["num_test_cases"] += 1
                 # Basic complexity, 1 per function
-                result["complexity"] = (
-                    result["complexity"] + 1 if result["complexity"] >= 0 else 1
-                )
-                debug_info["test_cases"].append(node.name)
+                result["complexity"] += 1
+                test_cases.append(name)
 
                 for body_node in node.body:  # Iterates over the body of the
                     # function
-                    if isinstance(body_node, ast.If):
+                    if type(body_node) is ast.If:
                         # Each 'if' branch increases complexity
-                        result["complexity"] = (
-                            result["complexity"] + 1 if result["complexity"] >= 0 else 1
-                        )
-                        debug_info["if_locations"].append(f"'if' in {node.name}")
-
-                    if isinstance(body_node, ast.Expr) and isinstance(
-                        body_node.value, ast.Call
-                    ):  # Checks if the node is an expression and a function
-                        # call.
-                        if (
-                            isinstance(body_node.value.func, ast.Name)
-                            and body_node.value.func.id == "assert"
-                        ):  # Checks if the function call is an assertion.
-                            result["num_assertions"] = (
-                                result["num_assertions"] + 1
-                                if result["num_assertions"] >= 0
-                                else 1
-                            )
-                            debug_info["assertion_locations"].append(
-                                f"assertion in {node.name}"
-                            )
-
-            if node.name == "setUp":
+                        result["complexity"] += 1
+
+                # `assert` is a statement rather than a call, and may be
+                # nested in a loop, `with` block, etc. within the test. The
+                # assertion methods of `unittest` (`self.assertEqual(...)`
+                # etc.) are calls made as statements.
+                for test_node in iter_statements(node):
+                    test_node_type = type(test_node)
+                    if test_node_type is ast.Assert:
+                        result["num_assertions"] += 1
+                    elif test_node_type is ast.Expr and is_assert_method_call(
+                        test_node.value
+                    ):
+                        result["num_assertions"] += 1
+
+            elif name == SETUP_METHOD:
                 result["has_setup"] = True
-                logger.debug(f"Found setup method: {node.name}")
 
-            if node.name == "tearDown":
+            elif name == TEARDOWN_METHOD:
                 result["has_teardown"] = True
-                logger.debug(f"Found teardown method: {node.name}")
-
-    logger.debug(
-        f"Analysis results for {file_path}:\n"
-        f"Test cases found ({len(debug_info['test_cases'])}): {', '.join(debug_info['test_cases'])}\n"
-        f"If statements found ({len(debug_info['if_locations'])}): {', '.join(debug_info['if_locations'])}\n"
-        f"Assertions found ({len(debug_info['assertion_locations'])}): {', '.join(debug_info['assertion_locations'])}\n"
-        f"Setup method: {'present' if result['has_setup'] else 'absent'}\n"
-        f"Teardown method: {'present' if result['has_teardown'] else 'absent'}\n"
-        f"Total complexity: {result['complexity']}"
+
+    for metric in COUNTED_METRICS:
+        if result[metric] == 0:
+            result[metric] = -1
+
+    ANALYSIS_CACHE[cache_key] = dict(result)
+    if len(ANALYSIS_CACHE) > ANALYSIS_CACHE_SIZE:
+        ANALYSIS_CACHE.popitem(last=False)
+
+    # Nothing is logged from within the walk. This one summary per file is
+    # only formatted when debug logging is enabled.
+    logger.opt(lazy=True).debug(
+        "{}",
+        lambda: (
+            f"Analysis results for {file_path}:\n"
+            f"Test cases found ({len(test_cases)}): {', '.join(test_cases)}\n"
+            f"Assertions found: {result['num_assertions']}\n"
+            f"Setup method: {'present' if result['has_setup'] else 'absent'}\n"
+            f"Teardown method: {'present' if result['has_teardown'] else 'absent'}\n"
+            f"Total complexity: {result['complexity']}\n"
+            f"Functions found: {result['num_functions']}\n"
+            f"Cyclomatic complexity: {result['cyclomatic_complexity']}"
+        ),
     )
 
     return result
 
 
-def analyse_code_file(file_path):
+def analyse_one(file_path):
     """
-    Analyses a Python code file to extract code metrics such as cyclomatic
-    complexity, lines of code, and the number of functions.
+    Runs the analysis of a single file.
+
+    This is the unit of work handed to the worker processes, so it lives at
+    module level (and therefore can be pickled) and never raises: failures are
+    reported through the returned dictionary instead.
 
     Args:
-        file_path (str): The path to the code file.
+        file_path (str): The path to the Python file.
 
     Returns:
-        dict: A dictionary containing the code metrics.
+        dict: The combined analysis results, including an 'analysis_error'
+        entry when the file could not be analysed.
     """
+    try:
+        file_analysis = analyse_file(file_path)
+
+        # Combine the analysis results with the original data
+        return {
+            "file_path": file_path,
+            **file_analysis,  # This unpacks the dictionary file_analysis and
+            # includes all its key-value pairs in the analysis_result
+            # dictionary.
+        }
 
-    logger.info(f"Starting analysis of code file: {file_path}")
+    except ParseError as e:
+        logger.error(f"Failed to analyse {file_path}: {str(e)}")
+        # Add failed file to results with error indicators. The lines are
+        # still counted, as the file was read but couldn't be parsed.
+        return {
+            "file_path": file_path,
+            "num_test_cases": -1,
+            "num_assertions": -1,
+            "has_setup": False,
+            "has_teardown": False,
+            "complexity": -1,
+            "cyclomatic_complexity": -1,
+            "lines_of_code": e.lines_of_code,
+            "num_functions": -1,
+            "analysis_error": str(e),
+        }
 
-    result = {
-        "cyclomatic_complexity": -1,
-        "lines_of_code": -1,
-        "num_functions": -1,
-    }
+    except ValueError as e:
+        logger.error(f"Failed to analyse {file_path}: {str(e)}")
+        # Add failed file to results with error indicators
+        return {
+            "file_path": file_path,
+            "num_test_cases": -1,
+            "num_assertions": -1,
+            "has_setup": False,
+            "has_teardown": False,
+            "complexity": -1,
+            "cyclomatic_complexity": -1,
+            "lines_of_code": -1,
+            "num_functions": -1,
+            "analysis_error": str(e),
+        }
+
+    except Exception as e:
+        logger.error(f"Unexpected error analysing {file_path}: {str(e)}")
+        # Add failed file to results with error indicators
+        return {
+            "file_path": file_path,
+            "num_test_cases": -1,
+            "num_assertions": -1,
+            "has_setup": False,
+            "has_teardown": False,
+            "complexity": -1,
+            "cyclomatic_complexity": -1,
+            "lines_of_code": -1,
+            "num_functions": -1,
+            "analysis_error": f"Unexpected error: {str(e)}",
+        }
 
-    # Dictionary to collect debug information
-    debug_info = {"function_complexities": [], "file_stats": {}}
 
-    tree, content = get_parsed_arg(file_path)
+def get_file_version(file_path):
+    """
+    Identifies the version of a file by its modification time and size.
 
-    # Initialise lines of code directly from content
-    result["lines_of_code"] = len(content.splitlines())
+    Args:
+        file_path (str): The path to the file.
 
+    Returns:
+        tuple: The modification time (in nanoseconds) and size of the file,
+        or None if the file can't be accessed.
+    """
     try:
-        visitor = PathGraphingAstVisitor()
-        visitor.preorder(tree, visitor)
-    except Exception as e:
-        logger.error(f"Failed to analyse complexity for {file_path}: {str(e)}")
-        raise ValueError(f"Failed to analyse complexity: {str(e)}")
-
-    for graph in visitor.graphs.values():
-        # Each graph in `visitor.graphs.values()` represents the control flow
-        # graph (CFG) of a single function, which is used to compute its
-        # cyclomatic complexity.
-        # `PathGraphingAstVisitor' processes the Abstract Syntax Tree (AST)
-        # of the code and generates a control flow graph for each function it
-        # encounters, storing these graphs in 'visitor.graphs'. Each entry in
-        # 'visitor.graphs' corresponds to one function, so iterating over it
-        # and counting with 'num_functions += 1' accurately captures the
-        # function count.
-
-        result["num_functions"] = (
-            result["num_functions"] + 1 if result["num_functions"] >= 0 else 1
-        )
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
 
-        complexity = graph.complexity()
-        result["cyclomatic_complexity"] = (
-            result["cyclomatic_complexity"] + complexity
-            if result["cyclomatic_complexity"] >= 0
-            else complexity
-        )
 
-        # Collect debug information
-        debug_info["function_complexities"].append(
-            f"{graph.name}: " f"complexity:{complexity}"
-        )
+def iter_analysis_results(file_paths, cache, executor):
+    """
+    Yields the analysis results of the files, in the order of `file_paths`.
 
-        # Collect file statistics for debug info
-        debug_info["file_stats"] = {
-            "total_lines": result["lines_of_code"],
-            "total_functions": result["num_functions"],
-            "avg_complexity": (
-                result["cyclomatic_complexity"] / result["num_functions"]
-                if result["num_functions"] > 0
-                else 0
-            ),
-        }
+    Files that haven't changed since they were last analysed have their
+    results taken from the cache (keyed by file path, storing the cache
+    version and the file version alongside the results); the others are
+    analysed by the worker processes and their results added to the cache.
+    Results cached by another `CACHE_VERSION` are not reused. Only this (the
+    main) process uses the cache, so the workers don't need to share it.
 
-    return result
+    Args:
+        file_paths (list): The paths of the files to analyse.
+        cache (shelve.Shelf): The cache of previous analysis results.
+        executor (ProcessPoolExecutor): The pool to analyse the files with.
 
+    Yields:
+        dict: The analysis results of each file.
+    """
+    # The version and cached results (or None) of each file
+    files = []
+    files_to_analyse = []
+    for file_path in file_paths:
+        version = get_file_version(file_path)
+        cached = cache.get(file_path) if version is not None else None
+        if cached is not None and cached[:2] == (CACHE_VERSION, version):
+            files.append((file_path, version, cached[2]))
+        else:
+            files.append((file_path, version, None))
+            files_to_analyse.append(file_path)
+
+    logger.info(
+        f"Reused the cached results of {len(file_paths) - len(files_to_analyse)}"
+        f" unchanged files, analysing {len(files_to_analyse)} files."
+    )
 
-if __name__ == "__main__":
-    args = parse_args()
-    input_file = args.input
-    output_file = args.output
+    # `map` yields the results in the order of `files_to_analyse`, so each is
+    # taken when its file is reached
+    analysis_results = executor.map(
+        analyse_one, files_to_analyse, chunksize=max(1, BATCH_SIZE // 4)
+    )
+    for file_path, version, analysis_result in files:
+        if analysis_result is None:
+            analysis_result = next(analysis_results)
+            if version is not None:
+                cache[file_path] = (CACHE_VERSION, version, analysis_result)
+        yield analysis_result
 
-    working_directory = get_working_directory_or_git_root()
-    logger.info(f"Working directory: {working_directory}")
 
-    df = pd.read_csv(input_file)
-    df_language_python = df[df["guessed_language"] == "Python"]
+def append_results_to_csv(results, output_file):
+    """
+    Appends a batch of analysis results to the output CSV file.
+
+    Only the new rows are written, so saving a batch costs the same however
+    many results the file already holds. The header is written when the file
+    is created.
+
+    Args:
+        results (list): The analysis results, one dictionary per file.
+        output_file (str): The path to the output CSV file.
+    """
+    batch_df = pd.DataFrame(results, columns=OUTPUT_COLUMNS)
+    batch_df.to_csv(
+        output_file, mode="a", header=not Path(output_file).exists(), index=False
+    )
 
-    # Initialise or load the final Dataframe
-    if Path(output_file).exists():
-        final_df = pd.read_csv(output_file)
-        logger.info(f"Loaded existing final Dataframe from {output_file}")
 
-    else:
-        final_df = pd.DataFrame()
+def append_results_to_parquet(results, output_dir):
+    """
+    Writes a batch of analysis results as a new Parquet file in the output
+    directory.
+
+    Each batch goes to its own file, so the results saved so far stay readable
+    if the run is interrupted and a later run can resume, as with the CSV
+    output.
 
-    # Extract already processed file paths
-    processed_files = (
-        set(final_df["file_path"].unique()) if not final_df.empty else set()
+    Args:
+        results (list): The analysis results, one dictionary per file.
+        output_dir (str): The path to the output directory.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    part_number = sum(1 for _ in output_dir.glob("part-*.parquet"))
+    table = pa.Table.from_pylist(results, schema=PARQUET_SCHEMA)
+    pq.write_table(
+        table, output_dir / f"part-{part_number:06d}.parquet", compression="zstd"
     )
-    logger.info(f"Found {len(processed_files)} already processed files.")
 
-    batch_results = []
 
-    for idx, row in df_language_python.iterrows():
-        file_path = row["file_path"]
+def load_processed_files(output_file, output_format):
+    """
+    Loads the paths of the files analysed by previous runs.
 
-        # Skip files already processed
-        if file_path in processed_files:
-            logger.debug(f"Skipping already processed file: {file_path}")
-            continue
+    Args:
+        output_file (str): The path to the output file or directory.
+        output_format (str): Either 'csv' or 'parquet'.
 
-        try:
-            test_file_analysis = analyse_test_file(file_path)
-            code_file_analysis = analyse_code_file(file_path)
+    Returns:
+        frozenset: The file paths already present in the output.
+    """
+    if not Path(output_file).exists():
+        return frozenset()
+
+    if output_format == "parquet":
+        existing_df = pd.read_parquet(output_file, columns=["file_path"])
+        logger.info(f"Loaded existing results from {output_file}")
+        return frozenset(existing_df["file_path"].tolist())
+
+    # New batches are appended using OUTPUT_COLUMNS, so make sure the header
+    # written by an earlier run has the same columns. Only the header is read
+    # unless the file needs rewriting.
+    columns = pd.read_csv(output_file, nrows=0).columns.tolist()
+    if columns != OUTPUT_COLUMNS:
+        pd.read_csv(output_file).reindex(columns=OUTPUT_COLUMNS).to_csv(
+            output_file, index=False
+        )
 
-            # Combine the analysis results with the original data
-            analysis_result = {
-                "file_path": file_path,
-                **test_file_analysis,  # This unpacks the dictionary test_file_
-                # analysis and includes all its key-value pairs in the analysis_
-                # result dictionary.
-                **code_file_analysis,
-            }
+    existing_df = pd.read_csv(output_file, usecols=["file_path"])
+    logger.info(f"Loaded existing results from {output_file}")
+    return frozenset(existing_df["file_path"].tolist())
 
-            batch_results.append(analysis_result)
 
-        except ValueError as e:
-            logger.error(f"Failed to analyse {file_path}: {str(e)}")
-            # Add failed file to results with error indicators
-            analysis_result = {
-                "file_path": file_path,
-                "num_test_cases": -1,
-                "num_assertions": -1,
-                "has_setup": False,
-                "has_teardown": False,
-                "complexity": -1,
-                "cyclomatic_complexity": -1,
-                "lines_of_code": -1,
-                "num_functions": -1,
-                "analysis_error": str(e),
-            }
-            batch_results.append(analysis_result)
-            continue  # Continue with next file
-
-        except Exception as e:
-            logger.error(f"Unexpected error analysing {file_path}: {str(e)}")
-            # Add failed file to results with error indicators
-            analysis_result = {
-                "file_path": file_path,
-                "num_test_cases": -1,
-                "num_assertions": -1,
-                "has_setup": False,
-                "has_teardown": False,
-                "complexity": -1,
-                "cyclomatic_complexity": -1,
-                "lines_of_code": -1,
-                "num_functions": -1,
-                "analysis_error": f"Unexpected error: {str(e)}",
-            }
+if __name__ == "__main__":
+    # Configure logger. This is done when the script is run rather than on
+    # import, so importing the module (e.g. in the tests) doesn't create a log
+    # file in the working directory.
+    logger.add("metrics_extraction.log", rotation="500 MB", level="INFO")
+
+    args = parse_args()
+    input_file = args.input
+    output_file = args.output
+    append_results = {
+        "csv": append_results_to_csv,
+        "parquet": append_results_to_parquet,
+    }[args.output_format]
+
+    working_directory = get_working_directory_or_git_root()
+    logger.info(f"Working directory: {working_directory}")
+
+    # Extract already processed file paths from the results of previous runs
+    processed_files = load_processed_files(output_file, args.output_format)
+    logger.info(f"Found {len(processed_files)} already processed files.")
+
+    # Only two columns of the input are needed, so read just those, in chunks,
+    # keeping the Python files that haven't been processed yet.
+    file_paths = []
+    for chunk in pd.read_csv(
+        input_file,
+        usecols=["file_path", "guessed_language"],
+        chunksize=INPUT_CHUNK_SIZE,
+    ):
+        is_python = chunk["guessed_language"].eq("Python")
+        is_processed = chunk["file_path"].isin(processed_files)
+        file_paths.extend(chunk.loc[is_python & ~is_processed, "file_path"].tolist())
+
+    # The same file can be listed more than once (e.g. a row for each time it
+    # was written to the database), but only needs analysing once. The paths
+    # keep the order in which they were first listed.
+    file_paths = list(dict.fromkeys(file_paths))
+    logger.info(f"{len(file_paths)} files left to analyse.")
+
+    batch_results = []
+
+    # Each file is analysed independently and the work is CPU-bound
+    # (`ast.parse` and the walk over the AST), so spread it over one worker
+    # process per core. `map` yields the results in input order, which keeps
+    # the batches written to disk deterministic.
+    with shelve.open(str(args.cache)) as cache, ProcessPoolExecutor(
+        max_workers=os.cpu_count()
+    ) as executor:
+        for analysis_result in iter_analysis_results(file_paths, cache, executor):
             batch_results.append(analysis_result)
-            continue  # Continue with next file
 
-        # Save the batch results every BATCH_SIZE files
-        if len(batch_results) >= BATCH_SIZE:
-            batch_df = pd.DataFrame(batch_results)
-            final_df = pd.concat([final_df, batch_df], ignore_index=True)
-            final_df.to_csv(output_file, index=False)
-            logger.info(f"Saved analysis results for {len(batch_results)} files")
+            # Save the batch results every BATCH_SIZE files
+            if len(batch_results) >= BATCH_SIZE:
+                append_results(batch_results, output_file)
+                logger.info(
+                    f"Saved analysis results for {len(batch_results)} files"
+                )
 
-            # Clear the batch results after saving
-            batch_results.clear()
+                # Clear the batch results after saving
+                batch_results.clear()
 
     # Save any remaining results after the loop
     if batch_results:
-        batch_df = pd.DataFrame(batch_results)
-        final_df = pd.concat([final_df, batch_df], ignore_index=True)
-
-        # Remove duplicates before saving
-        final_df.to_csv(output_file, index=False)
+        append_results(batch_results, output_file)
         logger.info(
             f"Saved final batch of analysis results for {len(batch_results)}" f" files"
         )
 
-    logger.info(f"Final dataframe saved to {output_file}")
+    logger.info(f"Analysis results saved to {output_file}")
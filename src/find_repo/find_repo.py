@@ -1,3 +1,5 @@
+import functools
+import os
 from pathlib import Path
 
 
@@ -7,11 +9,36 @@ def git_codebase_root(path):
 
     Returns the path if found, else None.
 
+    The roots found are cached, so finding the root for many files in the same
+    repository only looks at the filesystem once. A path with no root isn't
+    cached, so it is found if the repository is cloned or initialised later.
+
     Source of the underlying method is https://stackoverflow.com/a/67516092/340175
     The code has been tested interactively.
     """
-    for path in Path(path).parents:
-        # Check whether "path/.git" exists and is a directory
-        git_dir = path / ".git"
-        if git_dir.is_dir():
-            return path
+    try:
+        return _find_codebase_root(path)
+    except LookupError:
+        return None
+
+
+@functools.lru_cache(maxsize=4096)
+def _find_codebase_root(path):
+    """
+    Find repository root from the path's parents, raising LookupError if there
+    isn't one. `lru_cache` doesn't cache exceptions, so only the roots found
+    are cached.
+
+    The parents are walked with `os.path` rather than `Path.parents` to avoid
+    creating a `Path` for each.
+    """
+    path = os.path.abspath(path)
+    while True:
+        parent = os.path.dirname(path)
+        if parent == path:
+            # Reached the root of the filesystem
+            raise LookupError(f"No repository contains {path}")
+        # Check whether "parent/.git" exists and is a directory
+        if os.path.isdir(os.path.join(parent, ".git")):
+            return Path(parent)
+        path = parent
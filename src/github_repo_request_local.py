@@ -1,16 +1,27 @@
 import argparse
+import json
+import multiprocessing
 import shutil
 import subprocess
 import os
 import re
 import sys
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 from loguru import logger
 
 from utils.git_utils import get_working_directory_or_git_root
-from utils.export_to_rdf import dataframe_to_ttl
+from utils.export_to_rdf import iter_dataframe_ttl
 from utils.string_utils import sanitise_directory_name
 
 
@@ -64,6 +75,7 @@ last commit hashes.
 - --test-file-list: Path to the text file for recording repository URLs and test
   filenames.
 - --ttl-file: Path to save the Turtle (TTL) format file.
+- --max-workers: Number of repositories to clone at once.
 """
 
 test_runners = {
@@ -87,6 +99,35 @@ test_runners = {
 
 EXPECTED_URL_PARTS = 5
 
+# Size of the buffer for writing the test file list, which is flushed to disk
+# when the progress is saved
+TEST_FILE_LIST_BUFFER_SIZE = 8 * 1024 * 1024
+
+# Size of the buffer for writing the Turtle (TTL) file
+TTL_FILE_BUFFER_SIZE = 16 * 1024 * 1024
+
+# Default number of repositories to clone at once, and the number to clone
+# at most from the same host
+CLONE_WORKERS = 8
+CLONES_PER_DOMAIN = 4
+
+# Directories that hold version control data, dependencies, caches or build
+# output rather than a repository's own tests, which aren't searched for test
+# files
+SKIPPED_DIRECTORIES = frozenset(
+    {
+        ".git",
+        "node_modules",
+        "__pycache__",
+        ".venv",
+        "venv",
+        "dist",
+        "build",
+        ".tox",
+        ".mypy_cache",
+    }
+)
+
 
 def parse_args():
     """Parse command line arguments for excluded extensions and clone
@@ -139,24 +180,224 @@ def parse_args():
         default=str(Path("data/test_files_list.txt")),
         help="Path to the text file for writing repository URLs and test filenames.",
     )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=CLONE_WORKERS,
+        help="Number of repositories to clone (or delete) at once. At most "
+        f"{CLONES_PER_DOMAIN} are cloned from the same host at once.",
+    )
 
     return parser.parse_args()
 
 
+def iter_test_files(directory, inside_test=False):
+    """
+    Yields the files in a directory and its subdirectories that are named
+    like tests or are within a directory named like tests, i.e. whose name
+    contains 'test'.
+
+    The directories are read with `os.scandir`, whose entries cache the file
+    type, so no further `stat` calls are needed to tell files from
+    directories. As with `Path.rglob`, symbolic links to directories are not
+    followed. Directories in `SKIPPED_DIRECTORIES` aren't walked at all.
+
+    The directories still to be read are kept on a stack rather than walked
+    recursively, so deeply nested repositories don't pass each entry up
+    through a chain of generators, or reach the recursion limit.
+
+    Parameters:
+    - directory (str or Path): The directory to walk.
+    - inside_test (bool): Whether `directory` is within a test directory, in
+      which case every file in it is yielded.
+
+    Yields:
+    - os.DirEntry: The entry of each test file.
+    """
+    # The directories to read, each with whether it's within a test directory
+    stack = [(directory, inside_test)]
+    while stack:
+        directory, inside_test = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    is_test = inside_test or "test" in entry.name.lower()
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIPPED_DIRECTORIES:
+                            stack.append((entry.path, is_test))
+                    elif is_test and entry.is_file():
+                        yield entry
+        except PermissionError as e:
+            logger.warning(f"Skipping the directory {directory}: {e}")
+
+
 def list_test_files(directory, excluded_extensions):
-    """List test files in the directory, excluding specified extensions."""
-    logger.info(f"Processing the directory {directory}")
-    test_files = []
-    for item in directory.rglob("*"):
-        # Check if the item is a file and either the file or its parent
-        # directory contains 'test'
-        if item.is_file() and (
-            "test" in item.name.lower() or "test" in str(item.parent).lower()
-        ):
-            # Exclude files with certain extensions
-            if item.suffix not in excluded_extensions:
-                test_files.append(str(item))
-    return test_files
+    """
+    List test files in the directory, excluding specified extensions.
+
+    Parameters:
+    - directory (str or Path): The cloned repository.
+    - excluded_extensions (frozenset): The extensions of the files to
+      exclude, in lowercase, e.g. '.md'. Files are excluded whatever the case
+      of their extension. A set is quicker to check each file against than a
+      list.
+
+    Returns:
+    - list: The paths of the test files.
+    """
+    logger.debug(f"Processing the directory {directory}")
+    return [
+        entry.path
+        for entry in iter_test_files(directory)
+        # Exclude files with certain extensions
+        if os.path.splitext(entry.name)[1].lower() not in excluded_extensions
+    ]
+
+
+def get_domain_dir(clone_dir_base, repo_domain):
+    """
+    Works out the directory the repositories from a domain are cloned into,
+    named after the (sanitised) domain.
+
+    Parameters:
+    - clone_dir_base (Path): The directory the repositories are cloned into.
+    - repo_domain (str): The domain of the repositories.
+
+    Returns:
+    - Path: The directory for the domain's clones.
+    """
+    return clone_dir_base / sanitise_directory_name(repo_domain)
+
+
+def get_clone_dir(domain_dir, repo_url):
+    """
+    Works out the directory a repository is cloned into: a directory named
+    after the repository, within the directory for its domain.
+
+    Parameters:
+    - domain_dir (Path): The directory for the repository's domain (see
+      `get_domain_dir`).
+    - repo_url (str): The URL of the repository.
+
+    Returns:
+    - Path: The directory for the repository's clone.
+    """
+    repo_name = repo_url.rpartition("/")[2]
+    return domain_dir / os.path.splitext(repo_name)[0]
+
+
+def clone_repository(repo_url, clone_dir, domain_limit):
+    """
+    Clones a repository, unless it has been cloned already.
+
+    This is run in a worker thread, so that several repositories are cloned
+    at once.
+
+    Parameters:
+    - repo_url (str): The URL of the repository.
+    - clone_dir (Path): The directory to clone the repository into.
+    - domain_limit (threading.Semaphore): Limits the number of repositories
+      cloned at once from the repository's host.
+
+    Returns:
+    - str: The error message if the clone failed, None otherwise.
+    """
+    # Clone only if directory doesn't exist
+    if clone_dir.exists():
+        return None
+
+    with domain_limit:
+        try:
+            logger.debug(f"Trying to clone {repo_url} into {clone_dir}")
+            # Only the files of the latest commit are needed: no history,
+            # other branches or tags. The last commit hash recorded is
+            # therefore the tip of the default branch when it was cloned.
+            # Git is not allowed to prompt for credentials, so a repository
+            # that needs them fails straight away rather than waiting.
+            subprocess.run(
+                [
+                    "git",
+                    "clone",
+                    "--depth",
+                    "1",
+                    "--single-branch",
+                    "--no-tags",
+                    repo_url,
+                    str(clone_dir),
+                ],
+                check=True,
+                capture_output=True,
+                text=True,  # Output is captured as text
+                env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+            )
+            logger.debug(f"Successfully cloned the repo: {clone_dir.name}")
+            return None
+
+        except subprocess.CalledProcessError as e:
+            # Capture the error message from stderr
+            error_message = e.stderr.strip()
+            logger.error(
+                f"Failed to clone the repo: {clone_dir.name}.Exception: {e},"
+                f"Error message {error_message}"
+            )
+            return error_message
+
+
+def delete_clones(clone_dirs, max_workers=CLONE_WORKERS):
+    """
+    Deletes cloned repositories, several at once, as deleting a repository's
+    many small files is limited by the filesystem rather than this process.
+
+    Directories that don't exist, e.g. because the clone failed, are
+    ignored, as are errors deleting a directory.
+
+    Parameters:
+    - clone_dirs (iterable of Path): The directories of the cloned
+      repositories.
+    - max_workers (int): The number of directories to delete at once.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for clone_dir in clone_dirs:
+            executor.submit(shutil.rmtree, clone_dir, ignore_errors=True)
+
+
+def read_head_commit_hash(repo_dir: Path):
+    """
+    Reads the hash of the commit checked out in a Git repository from the
+    files in its `.git` directory, which is much quicker than starting a `git`
+    process.
+
+    HEAD either holds the hash itself (a detached HEAD) or names the branch
+    that is checked out, whose hash is in its own file under `.git/refs` or,
+    once the refs have been packed, in `.git/packed-refs`.
+
+    Parameters:
+    - repo_dir (Path): The path to the cloned Git repository.
+
+    Returns:
+    - str: The hash of the last commit, or None if it couldn't be read, e.g.
+      if `.git` is a file (as in a worktree) rather than a directory.
+    """
+    git_dir = Path(repo_dir) / ".git"
+    try:
+        head = (git_dir / "HEAD").read_text().strip()
+        if not head.startswith("ref: "):
+            return head or None
+
+        ref = head.removeprefix("ref: ")
+        ref_path = git_dir / ref
+        if ref_path.is_file():
+            return ref_path.read_text().strip() or None
+
+        with open(git_dir / "packed-refs") as packed_refs:
+            for line in packed_refs:
+                commit_hash, _, name = line.rstrip("\n").partition(" ")
+                if name == ref:
+                    return commit_hash
+    except OSError:
+        pass
+
+    return None
 
 
 def get_last_commit_hash(repo_dir: Path):
@@ -164,12 +405,19 @@ def get_last_commit_hash(repo_dir: Path):
     Fetches the hash of the last commit of the Git repository located in
     repo_dir.
 
+    The hash is read from the repository's files where possible (see
+    `read_head_commit_hash`), falling back to `git rev-parse HEAD`.
+
     Parameters:
     - repo_dir (Path): The path to the cloned Git repository.
 
     Returns:
     - str: The hash of the last commit if successful, None otherwise.
     """
+    commit_hash = read_head_commit_hash(repo_dir)
+    if commit_hash is not None:
+        return commit_hash
+
     try:
         # Execute the git command to get the last commit hash
         result = subprocess.run(
@@ -177,11 +425,11 @@ def get_last_commit_hash(repo_dir: Path):
             cwd=repo_dir,  # Set the current working directory to the repo
             # directory
             capture_output=True,
-            text=True,  # Capture the output as text
             check=True,  # Raise an exception if the command fails
         )
-        return result.stdout.strip()  # Return the commit hash, stripped of any
-        # newline characters
+        # The output is the hash in hexadecimal followed by a newline, so it's
+        # decoded as ASCII rather than through the locale's encoding
+        return result.stdout.decode("ascii").rstrip()
     except subprocess.CalledProcessError as e:
         logger.error(
             f"Failed to fetch last commit hash for {repo_dir}. " f"Exception: {e}"
@@ -189,6 +437,110 @@ def get_last_commit_hash(repo_dir: Path):
         return None  # Return None to indicate failure
 
 
+def scan_repository(clone_dir, excluded_extensions):
+    """
+    Scans a cloned repository for the hash of its last commit, its test files
+    and the test runners it uses.
+
+    This is run in a worker process, so that several repositories are scanned
+    at once.
+
+    Parameters:
+    - clone_dir (Path): The path to the cloned repository.
+    - excluded_extensions (frozenset): The extensions of the files that don't
+      count as test files.
+
+    Returns:
+    - tuple: The hash of the last commit (or None), the list of test file
+      paths, and the test runner details (see `detect_test_runners2`).
+    """
+    logger.debug(
+        'Counting test runner files matching "dependency_patterns", '
+        '"config_files", "file_patterns"'
+    )
+    return (
+        get_last_commit_hash(clone_dir),
+        list_test_files(clone_dir, excluded_extensions),
+        detect_test_runners2(clone_dir),
+    )
+
+
+def save_progress(progress_path, df, indices, columns):
+    """
+    Appends the results of the given rows to the progress file, one JSON
+    object per row.
+
+    Only the rows processed since the progress was last saved are written,
+    rather than rewriting the whole output CSV for every batch.
+
+    Parameters:
+    - progress_path (Path): The path to the progress file.
+    - df (pd.DataFrame): The DataFrame holding the results.
+    - indices (list): The index labels of the rows to save.
+    - columns (list): The columns holding the results.
+    """
+    with open(progress_path, "a") as progress_file:
+        for index in indices:
+            record = {"index": index, **df.loc[index, columns].to_dict()}
+            progress_file.write(json.dumps(record) + "\n")
+
+
+def load_progress(progress_path, df):
+    """
+    Applies the results saved to the progress file by an earlier, interrupted
+    run (see `save_progress`) to the DataFrame.
+
+    Parameters:
+    - progress_path (Path): The path to the progress file.
+    - df (pd.DataFrame): The DataFrame to update.
+
+    Returns:
+    - int: The number of rows updated.
+    """
+    if not progress_path.exists():
+        return 0
+
+    with open(progress_path) as progress_file:
+        records = [json.loads(line) for line in progress_file if line.strip()]
+    if not records:
+        return 0
+
+    progress = pd.DataFrame.from_records(records, index="index")
+    # A row may have been saved more than once; its latest results win
+    progress = progress[~progress.index.duplicated(keep="last")]
+    df.loc[progress.index, progress.columns] = progress
+    return len(progress)
+
+
+def save_ttl(df, ttl_path, max_workers=1):
+    """
+    Converts the DataFrame to Turtle (TTL) format and saves it to a file.
+
+    Each row's Turtle is written as it's made rather than holding them all in
+    memory, to a temporary file that replaces the TTL file only once every
+    row is written, so a failed conversion (e.g. a missing column) leaves any
+    earlier TTL file in place rather than an empty or partial one. The file
+    has a large buffer so the short strings are written in few system calls.
+
+    Parameters:
+    - df (pd.DataFrame): The DataFrame to convert.
+    - ttl_path (Path): The path to save the TTL file to.
+    - max_workers (int): The number of worker processes to convert the rows
+      in (see `iter_dataframe_ttl`).
+    """
+    temporary_path = ttl_path.with_name(ttl_path.name + ".tmp")
+    try:
+        with open(temporary_path, "wb", buffering=TTL_FILE_BUFFER_SIZE) as f:
+            for ttl in iter_dataframe_ttl(df, max_workers=max_workers):
+                f.write(ttl.encode("utf-8"))
+                # Add a newline between each entry for better readability
+                f.write(b"\n")
+    except BaseException:
+        temporary_path.unlink(missing_ok=True)
+        raise
+    os.replace(temporary_path, ttl_path)
+
+
 def add_explanations(df):
     """
     Adds an 'explanation' column to the DataFrame, which contains detailed
@@ -201,46 +553,74 @@ def add_explanations(df):
         pd.DataFrame: The updated DataFrame with an 'explanation' column added.
     """
 
-    def get_explanation(row):
-        explanations = []
-        clone_status = row.get("clone_status", None)
-        last_commit_hash = row.get("last_commit_hash", None)
-        if row.get("duplicate_flag", default=False):
-            explanations.append("Row is marked as a duplicate of another entry.")
-        elif row.get("null_value_flag", default=False):
-            explanations.append("Row contains null values.")
-        elif row.get("unsupported_url_scheme", default=False):
-            explanations.append(
-                "Domain could not be extracted due to unsupported or malformed " "URL."
-            )
-        elif row.get("incomplete_url_flag", default=False):
-            url_parts = row["repourl"].rstrip("/").split("/")
-            if len(url_parts) < EXPECTED_URL_PARTS:
-                missing_parts = EXPECTED_URL_PARTS - len(url_parts)
-                explanations.append(
-                    f"URL is incomplete; missing {missing_parts}"
-                    f" parts (expects protocol, domain, and "
-                    f"path)."
-                )
-        elif row.get("base_repo_url_flag", default=False):
-            explanations.append("Unable to extract base repository URL.")
-
-        elif clone_status == "failed":
-            explanations.append("Repository clone failed.")
-        elif clone_status is None:
-            explanations.append("Clone status unknown.")
-
-        if clone_status == "successful":
-            if row.get("testfilecountlocal", -1) == -1:
-                explanations.append("Test files could not be counted.")
-
-            if last_commit_hash is None:
-                explanations.append("Last commit hash could not be retrieved.")
-
-        return " | ".join(explanations) if explanations else "No issues detected."
-
-    # Apply the get_explanation function to each row
-    df["explanation"] = df.apply(get_explanation, axis=1)
+    def flag(column):
+        # The truth value of each flag, which is False if there's no such
+        # column
+        if column not in df.columns:
+            return pd.Series(False, index=df.index)
+        return df[column].astype(bool)
+
+    def column_or(column, default):
+        if column not in df.columns:
+            return pd.Series(default, index=df.index, dtype=object)
+        return df[column]
+
+    clone_status = column_or("clone_status", None)
+    url_parts_count = column_or("repourl", "").str.rstrip("/").str.count("/") + 1
+    missing_parts = EXPECTED_URL_PARTS - url_parts_count
+
+    # Only the first of these problems that affects a row is explained. An
+    # incomplete URL isn't explained if it has the expected number of parts.
+    explanation = pd.Series(
+        np.select(
+            [
+                flag("duplicate_flag"),
+                flag("null_value_flag"),
+                flag("unsupported_url_scheme"),
+                flag("incomplete_url_flag"),
+                flag("base_repo_url_flag"),
+                clone_status.eq("failed"),
+                clone_status.isna(),
+            ],
+            [
+                "Row is marked as a duplicate of another entry.",
+                "Row contains null values.",
+                "Domain could not be extracted due to unsupported or malformed "
+                "URL.",
+                np.where(
+                    missing_parts > 0,
+                    "URL is incomplete; missing "
+                    + missing_parts.astype(str)
+                    + " parts (expects protocol, domain, and path).",
+                    "",
+                ),
+                "Unable to extract base repository URL.",
+                "Repository clone failed.",
+                "Clone status unknown.",
+            ],
+            default="",
+        ),
+        index=df.index,
+        dtype=object,
+    )
+
+    # Successfully cloned repositories can have further problems, which are
+    # added to the explanation
+    cloned = clone_status.eq("successful")
+    for message, has_problem in (
+        (
+            "Test files could not be counted.",
+            cloned & column_or("testfilecountlocal", -1).eq(-1),
+        ),
+        (
+            "Last commit hash could not be retrieved.",
+            cloned & column_or("last_commit_hash", None).isna(),
+        ),
+    ):
+        separated = explanation.where(explanation.eq(""), explanation + " | ")
+        explanation = explanation.mask(has_problem, separated + message)
+
+    df["explanation"] = explanation.mask(explanation.eq(""), "No issues detected.")
 
     return df
 
@@ -324,6 +704,7 @@ if __name__ == "__main__":
 
     # Log the excluded file extensions
     logger.info(f"Excluded file extensions: {', '.join(args.exclude)}")
+    excluded_extensions = frozenset(extension.lower() for extension in args.exclude)
 
     # Use get_working_directory_or_git_root to define paths relative to the
     # repository root
@@ -371,11 +752,24 @@ if __name__ == "__main__":
         df[f"{runner}_config_files"] = 0
         df[f"{runner}_file_patterns"] = 0
 
-    # Number of repositories to process before saving to CSV
+    # The results of an interrupted run are saved as they are made to a
+    # progress file next to the output file, which is deleted once the output
+    # file has been written
+    progress_path = updated_csv_path.with_suffix(".progress.jsonl")
+    progress_columns = ["clone_status", "testfilecountlocal", "last_commit_hash"] + [
+        f"{runner}_{indicator}"
+        for runner in test_runners.keys()
+        for indicator in ("dependency_patterns", "config_files", "file_patterns")
+    ]
+    resumed_count = load_progress(progress_path, df)
+    if resumed_count:
+        logger.info(f"Resuming with the progress of {resumed_count} repositories")
+
+    # Number of repositories to process before saving the progress
     BATCH_SIZE = 10
 
-    # Track the number of processed repositories in the current batch
-    processed_count = 0
+    # The index labels of the repositories processed in the current batch
+    batch_indices = []
 
     # Define the path for the text file where test filenames and URLs will be
     # saved otherwise the default path will be used:
@@ -383,146 +777,195 @@ if __name__ == "__main__":
     test_file_list_path = repo_root / Path(args.test_file_list)
     logger.info(f"test_file_list_path is: {test_file_list_path}")
 
-    # Open the text file just before the loop begins
-    with open(test_file_list_path, "a") as file:
-        for index, row in df.iterrows():
-            # Check if we need to skip this iteration and move to the next
-            # row as the data is either duplicate, there was
-            # an issue extracting the repository domain,
-            # URL lacks specific repository details(owner/reponame),
-            # or there was a problem extracting the base repository URL.
-
-            if (
-                row["duplicate_flag"] is True
-                or row["unsupported_url_scheme"] is True
-                or row["incomplete_url_flag"] is True
-                or row["base_repo_url_flag"] is (None or True)
-            ):
-                continue
-
-            # Check if we need to skip this repository because it's fully
-            # processed
-            if row["testfilecountlocal"] != -1 and pd.notna(row["last_commit_hash"]):
-                continue
-            repo_url = row["repourl"]
-            if not repo_url or repo_url is None:
-                logger.info(f"Invalid repository URL: {repo_url}")
-                continue
-
-            repo_domain = row["repodomain"]
-
-            # Sanitise the domain name
-            sanitised_domain = sanitise_directory_name(repo_domain)
-            repo_name = Path(repo_url.split("/")[-1]).stem
-
-            # Adjusted path including domain
-            domain_specific_dir = clone_dir_base / sanitised_domain
-            domain_specific_dir.mkdir(parents=True, exist_ok=True)
-            clone_dir = domain_specific_dir / repo_name
-            logger.info(f"Sanitised clone directory is: {clone_dir}")
-
-            # Clone only if directory doesn't exist
-            if not clone_dir.exists():
-                try:
-                    logger.info(f"Trying to clone {repo_url} into {clone_dir}")
-                    subprocess.run(
-                        ["git", "clone", "--depth", "1", repo_url, str(clone_dir)],
-                        check=True,
-                        capture_output=True,
-                        text=True,  # Output is captured as text
-                    )
-                    df.at[index, "clone_status"] = "successful"
-                    logger.info(f"Successfully cloned the repo: {repo_name}")
-                    # On successful clone, increment the processed_count
-                    processed_count += 1
-
-                except subprocess.CalledProcessError as e:
-                    # Capture the error message from stderr
-                    error_message = e.stderr.strip()
-                    logger.error(
-                        f"Failed to clone the repo: {repo_name}.Exception: {e},"
-                        f"Error message {error_message}"
-                    )
-                    df.at[index, "clone_status"] = "failed"
-                    df.at[index, "testfilecountlocal"] = -1
-
-                    # Even on failure, consider it processed for this batch
-                    processed_count += 1
-                    # Write the error information to the error log file
-                    error_log_file.write(
-                        f"Repository URL: {repo_url}\nError Message: "
-                        f"{error_message}\n\n"
+    # The rows to process, by the directory their repository is cloned into.
+    # A repository listed in more than one row is only cloned once.
+    # Skip the rows whose data is either duplicate, there was an issue
+    # extracting the repository domain, URL lacks specific repository
+    # details(owner/reponame), or there was a problem extracting the base
+    # repository URL. The flags are only set if they are True, except that a
+    # missing base repository URL flag also skips the row, as the URL was
+    # never checked.
+    is_flagged = (
+        df["duplicate_flag"].eq(True)
+        | df["unsupported_url_scheme"].eq(True)
+        | df["incomplete_url_flag"].eq(True)
+        | df["base_repo_url_flag"].fillna(True).eq(True)
+    )
+    # Also skip the repositories that are fully processed
+    is_processed = df["testfilecountlocal"].ne(-1) & df["last_commit_hash"].notna()
+    has_url = df["repourl"].notna() & df["repourl"].ne("")
+    is_eligible = ~is_flagged & ~is_processed & has_url
+    logger.info(
+        f"{is_eligible.sum()} of {len(df)} repositories to process "
+        f"({is_flagged.sum()} flagged, {(~is_flagged & is_processed).sum()} "
+        f"already processed, {(~is_flagged & ~is_processed & ~has_url).sum()} "
+        f"without a URL)"
+    )
+
+    # The directory for each domain is worked out and created once, rather
+    # than for every row.
+    eligible_rows = df[is_eligible]
+    domain_dirs = {
+        repo_domain: get_domain_dir(clone_dir_base, repo_domain)
+        for repo_domain in eligible_rows["repodomain"].unique()
+    }
+    for domain_dir in domain_dirs.values():
+        domain_dir.mkdir(exist_ok=True)
+
+    rows_by_clone_dir = {}
+    for row in eligible_rows.itertuples():
+        clone_dir = get_clone_dir(domain_dirs[row.repodomain], row.repourl)
+        logger.debug(f"Sanitised clone directory is: {clone_dir}")
+        rows_by_clone_dir.setdefault(clone_dir, []).append(row)
+
+    # The repositories cloned by this run, which are deleted afterwards unless
+    # --keep-clones is given. Clones kept from an earlier run are reused and
+    # aren't deleted.
+    created_clones = [
+        clone_dir for clone_dir in rows_by_clone_dir if not clone_dir.exists()
+    ]
+
+    # Cloning is limited by the network rather than this machine, so several
+    # repositories are cloned at once, but only a few from the same host.
+    domain_limits = {
+        rows[0].repodomain: threading.Semaphore(CLONES_PER_DOMAIN)
+        for rows in rows_by_clone_dir.values()
+    }
+
+    # The clones run in worker threads. Once a repository has been cloned it
+    # is scanned in a worker process, as walking and reading the files uses
+    # the CPU, while other repositories are still being cloned. The results
+    # are recorded in this thread, so the DataFrame and the output files are
+    # only written from here. The worker processes are started with "spawn"
+    # rather than forked: a process forked while a clone is running would
+    # inherit the pipes of its git process, and the clone would then wait
+    # for their output forever.
+    with open(
+        test_file_list_path, "ab", buffering=TEST_FILE_LIST_BUFFER_SIZE
+    ) as file, ThreadPoolExecutor(
+        max_workers=args.max_workers
+    ) as clone_executor, ProcessPoolExecutor(
+        max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn")
+    ) as scan_executor:
+        clone_futures = {
+            clone_executor.submit(
+                clone_repository,
+                rows[0].repourl,
+                clone_dir,
+                domain_limits[rows[0].repodomain],
+            ): clone_dir
+            for clone_dir, rows in rows_by_clone_dir.items()
+        }
+        scan_futures = {}
+
+        pending = set(clone_futures)
+
+        # The per-repository messages are logged at debug level; progress is
+        # logged once per batch
+        total_count = sum(len(rows) for rows in rows_by_clone_dir.values())
+        processed_count = 0
+        batch_start = time.monotonic()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in clone_futures:
+                    clone_dir = clone_futures[future]
+                    error_message = future.result()
+                    if error_message is None:
+                        scan_future = scan_executor.submit(
+                            scan_repository, clone_dir, excluded_extensions
+                        )
+                        scan_futures[scan_future] = clone_dir
+                        pending.add(scan_future)
+                        continue
+                else:
+                    clone_dir = scan_futures[future]
+                    error_message = None
+                    last_commit_hash, test_file_names, runner_presence = (
+                        future.result()
                     )
-                    continue
-            else:
-                # If cloned directory already exists, consider as successful
-                df.at[index, "clone_status"] = "successful"
-
-            # Always attempt to fetch the last commit hash if not already
-            # fetched
-            if pd.isna(row["last_commit_hash"]):
-                last_commit_hash = get_last_commit_hash(clone_dir)
-                df.at[index, "last_commit_hash"] = last_commit_hash
-
-            # Count test files if not already counted
-            if row["testfilecountlocal"] == -1:
-                test_file_names = list_test_files(clone_dir, args.exclude)
-                count = len(test_file_names)
-                df.at[index, "testfilecountlocal"] = count
-
-                # Write the repository URL and each test filename to the text
-                # file
-                file.write(f"Repository URL: {repo_url}\n")
-                file.writelines(
-                    f"{name}\n" for name in test_file_names
-                )  # Write each test filename
-                file.write("\n")  # Add a blank line for separation
-                logger.info(
-                    f"Test file names for the repo `{repo_name}`"
-                    f" has been written to '{test_file_list_path}'"
-                )
-
-            # Detecting and analysing test runners
-            logger.info(
-                'Counting test runner files matching "dependency_patterns", '
-                '"config_files", "file_patterns" and saving the values in the '
-                "respective columns"
-            )
-            runner_presence = detect_test_runners2(clone_dir)
-
-            for runner, details in runner_presence.items():
-                df.at[index, f"{runner}_dependency_patterns"] = details[
-                    "dependency_patterns"
-                ]
-                df.at[index, f"{runner}_config_files"] = details["config_files"]
-                df.at[index, f"{runner}_file_patterns"] = details["file_patterns"]
-
-            processed_count += 1
-
-            # Processed count increment and batch check
-            if processed_count >= BATCH_SIZE:
-                # Save the DataFrame to CSV
-                df.to_csv(updated_csv_path, index=False)
-                logger.info(
-                    f"Batch of {BATCH_SIZE} repositories processed. "
-                    f"Progress saved in {updated_csv_path}."
-                )
-
-                # Reset the processed_count for the next batch
-                processed_count = 0
-
-    # Save any remaining changes at the end of processing
-    if processed_count > 0:
-        df.to_csv(updated_csv_path, index=False)
-        logger.info(f"Final batch processed. DataFrame saved in {updated_csv_path}.")
-
-        # Cleanup based on user's command-line option
-        if not args.keep_clones:
-            # If user did not specify --keep-clones, delete the directory
-            logger.info(
-                '"--keep-clones" flag was not specified, deleting the directory"'
-            )
-            shutil.rmtree(clone_dir)
+
+                for row in rows_by_clone_dir[clone_dir]:
+                    repo_url = row.repourl
+                    batch_indices.append(row.Index)
+
+                    if error_message is not None:
+                        df.at[row.Index, "clone_status"] = "failed"
+                        df.at[row.Index, "testfilecountlocal"] = -1
+
+                        # Write the error information to the error log file
+                        error_log_file.write(
+                            f"Repository URL: {repo_url}\nError Message: "
+                            f"{error_message}\n\n"
+                        )
+                    else:
+                        df.at[row.Index, "clone_status"] = "successful"
+
+                        if pd.isna(row.last_commit_hash):
+                            df.at[row.Index, "last_commit_hash"] = last_commit_hash
+
+                        if row.testfilecountlocal == -1:
+                            df.at[row.Index, "testfilecountlocal"] = len(
+                                test_file_names
+                            )
+
+                            # Write the repository URL and each test filename
+                            # to the text file, followed by a blank line for
+                            # separation, in a single write
+                            entry_lines = [
+                                b"Repository URL: " + repo_url.encode(),
+                                *map(os.fsencode, test_file_names),
+                                b"",
+                            ]
+                            file.write(b"\n".join(entry_lines) + b"\n")
+                            logger.debug(
+                                f"Test file names for the repo "
+                                f"`{clone_dir.name}` has been written to "
+                                f"'{test_file_list_path}'"
+                            )
+
+                        for runner, details in runner_presence.items():
+                            for indicator, value in details.items():
+                                df.at[row.Index, f"{runner}_{indicator}"] = value
+
+                    # Batch check
+                    if len(batch_indices) >= BATCH_SIZE:
+                        # The test file names are saved before the progress
+                        # that says they have been written
+                        file.flush()
+                        save_progress(
+                            progress_path, df, batch_indices, progress_columns
+                        )
+                        processed_count += len(batch_indices)
+                        batch_seconds = time.monotonic() - batch_start
+                        logger.info(
+                            f"Batch of {BATCH_SIZE} repositories processed "
+                            f"({processed_count} of {total_count}, "
+                            f"{batch_seconds / BATCH_SIZE:.1f}s per repository)."
+                            f" Progress saved in {progress_path}."
+                        )
+
+                        # Start the next batch
+                        batch_indices.clear()
+                        batch_start = time.monotonic()
+
+    # Save any remaining progress at the end of processing
+    if batch_indices:
+        save_progress(progress_path, df, batch_indices, progress_columns)
+        logger.info(f"Final batch processed. Progress saved in {progress_path}.")
+
+    # Cleanup based on user's command-line option
+    if not args.keep_clones:
+        # If user did not specify --keep-clones, delete the repositories
+        # cloned for this run. A failed clone leaves no directory.
+        created_clones = [
+            clone_dir for clone_dir in created_clones if clone_dir.exists()
+        ]
+        logger.info(
+            '"--keep-clones" flag was not specified, deleting '
+            f"the {len(created_clones)} repositories cloned by this run"
+        )
+        delete_clones(created_clones, max_workers=args.max_workers)
 
     logger.info("All repositories processed. DataFrame saved.")
 
@@ -531,6 +974,7 @@ if __name__ == "__main__":
     df = add_explanations(df)
     df.to_csv(updated_csv_path, index=False)
     logger.info(f"DataFrame saved in {updated_csv_path}.")
+    progress_path.unlink(missing_ok=True)
 
     # Exporting the result to an RDF format
 
@@ -538,16 +982,8 @@ if __name__ == "__main__":
     # in the default location : "data/all_data.ttl"
     path_to_save_ttl = repo_root / Path(args.ttl_file)
 
-    # Convert DataFrame to Turtle format
-    ttl_data = dataframe_to_ttl(df)
-
-    # Save all Turtle strings to a single file
-    with open(path_to_save_ttl, "w") as f:
-        for ttl in ttl_data:
-            f.write(ttl)
-            f.write(
-                "\n"
-            )  # Optionally add a newline between each entry for better readability
+    # Large DataFrames are converted in a worker process per CPU
+    save_ttl(df, path_to_save_ttl, max_workers=os.cpu_count())
 
     error_log_file.close()
 
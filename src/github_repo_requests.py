@@ -1,10 +1,19 @@
 import os
-import time
 
 from loguru import logger
 import pandas as pd
-from requests_ratelimiter import LimiterSession
+from requests import Session
+from requests.adapters import HTTPAdapter
+from requests_cache import CacheMixin
+from requests_ratelimiter import LimiterMixin
+from urllib3.util import Retry
 from utils.git_utils import git_codebase_root
+from utils.github_client import GitHubClient
+
+# GitHub allows 10 code searches a minute, and 5,000 requests an hour to the
+# rest of the API (roughly 80 a minute), for an authenticated user
+SEARCH_REQUESTS_PER_MINUTE = 5
+CORE_REQUESTS_PER_MINUTE = 80
 
 
 def load_data(filepath):
@@ -37,8 +46,90 @@ def extract_owner_and_repo_names(repourl):
     return repo_path
 
 
-def get_test_file_count(repo_path, headers):
-    session = LimiterSession(per_minute=5)
+class CachedLimiterSession(CacheMixin, LimiterMixin, Session):
+    """
+    A session that both caches responses and limits the rate of requests.
+
+    Responses served from the cache do not count towards the rate limit.
+    """
+
+
+def normalise_repo_urls(repourls):
+    """
+    Normalises repository URLs so the same repository is always written the
+    same way: surrounding whitespace and trailing "/"s are removed, http is
+    replaced with https, and "www." is dropped from the host.
+
+    Args:
+        repourls (pd.Series): The repository URLs.
+
+    Returns:
+        pd.Series: The normalised URLs.
+    """
+    repourls = repourls.str.strip().str.rstrip("/")
+
+    # replace http with https and www.github.com with github.com, in one pass
+    # over the URLs
+    return repourls.str.replace(r"^https?://(www\.)?", "https://", regex=True)
+
+
+def create_github_session(
+    headers, cache_name, per_minute=SEARCH_REQUESTS_PER_MINUTE
+):
+    """
+    Creates a cached, rate limited session for requests to the GitHub API.
+
+    Cached responses are always revalidated with GitHub using their ETag, so
+    the data is never stale, but an unchanged resource comes back as a
+    `304 Not Modified`, which does not count against GitHub's rate limit.
+    Requests that hit a server error are retried with an exponential backoff;
+    rate limited requests are handled by the `GitHubClient`.
+
+    Args:
+        headers (dict): Headers sent with every request, e.g. authentication.
+        cache_name (str): Path of the SQLite cache (without the extension).
+        per_minute (int): The maximum number of requests per minute.
+
+    Returns:
+        CachedLimiterSession: The session to wrap in a `GitHubClient`.
+    """
+    session = CachedLimiterSession(
+        cache_name=cache_name,
+        backend="sqlite",
+        always_revalidate=True,
+        per_minute=per_minute,
+    )
+    session.headers.update(headers)
+    session.mount(
+        "https://",
+        HTTPAdapter(
+            max_retries=Retry(
+                total=5,
+                backoff_factor=1,
+                status_forcelist=[500, 502, 503, 504],
+                # Return the last response rather than raising, so the error
+                # is logged by `make_github_request`
+                raise_on_status=False,
+            )
+        ),
+    )
+    return session
+
+
+def get_test_file_count(repo_path, client):
+    """
+    Counts the files with "test" in their path in a GitHub repository, using
+    the code search API.
+
+    Args:
+        repo_path (str): The repository's owner and name, e.g. 'owner/repo'.
+        client (GitHubClient): The client to send the requests with.
+
+    Returns:
+        int: The number of test files, or -1 if any page of the search
+        results couldn't be fetched, so the repository is searched again by
+        the next run rather than saved with a partial count.
+    """
     test_files = []
     page = 1
     more_pages = True
@@ -52,38 +143,38 @@ def get_test_file_count(repo_path, headers):
         )
         logger.debug(f"Search Url: {search_url}")
 
-        response = make_github_request(url=search_url, session=session, headers=headers)
-        if response:
-            search_results = response.json()
-            if "items" not in search_results:
-                logger.error(
-                    f"Unable to find 'items' in search_results. Got "
-                    f"{search_results}"
-                )
-            else:
-                test_files.extend(search_results["items"])
-                for item in search_results["items"]:
-                    logger.debug(f'File Name: {item["name"]}, Path: {item["path"]}')
-                if "next" in response.links:
-                    page += 1
-                else:
-                    more_pages = False  # Exit loop if there are no more pages
+        response = make_github_request(url=search_url, client=client)
+        if response is None:
+            logger.warning(f"Failed to fetch page {page} of the test files")
+            return -1
+
+        search_results = response.json()
+        if "items" not in search_results:
+            logger.error(
+                f"Unable to find 'items' in search_results. Got {search_results}"
+            )
+            return -1
+
+        test_files.extend(search_results["items"])
+        for item in search_results["items"]:
+            logger.debug(f'File Name: {item["name"]}, Path: {item["path"]}')
+        if "next" in response.links:
+            page += 1
+        else:
+            more_pages = False  # Exit loop if there are no more pages
 
     test_file_count = len(test_files)
     return test_file_count
 
 
-def get_latest_commit_info(repo_path, headers):
-    session = LimiterSession(per_minute=5)
+def get_latest_commit_info(repo_path, client):
     # Get the commit hash
     # As per: https://docs.github.com/en/rest/commits/
     # commits?apiVersion=2022-11-28
     # "https://api.github.com/repos/OWNER/REPO/commits"
     commit_url = f"https://api.github.com/repos/{repo_path}/commits"
     logger.debug(f"Commit Url: {commit_url}")
-    commit_response = make_github_request(
-        url=commit_url, session=session, headers=headers
-    )
+    commit_response = make_github_request(url=commit_url, client=client)
     if commit_response:
         commit_results = commit_response.json()
         # Note: there are 2 commits returned, not sure why...
@@ -99,23 +190,33 @@ def get_latest_commit_info(repo_path, headers):
             logger.debug(f"sha: {sha}, html_url: {html_url}")
             return sha, html_url
 
+    return None, None
 
-def make_github_request(url, session, headers, attempt_num=1):
-    if attempt_num > 10:
-        logger.error(f"Reached max attempt count of 10 for {url}.")
-        return
 
-    logger.info(f"Making attempt num: {attempt_num} for the url: {url}")
-    response = session.get(url, headers=headers)
+def make_github_request(url, client):
+    """
+    Requests a URL from the GitHub API.
+
+    Rate limited requests are retried by the client, and server errors by the
+    session (see `create_github_session`); any other error is not going to go
+    away by retrying (e.g. a repository that no longer exists), so is logged
+    and skipped.
+
+    Args:
+        url (str): The URL to request.
+        client (GitHubClient): The client to send the request with.
+
+    Returns:
+        requests.Response: The response, or None if the request failed.
+    """
+    logger.info(f"Requesting the url: {url}")
+    response = client.get(url)
     if response.status_code != 200:
-        time_to_pause = attempt_num * 2
-        logger.warning(
+        logger.error(
             f"Received status: {response.status_code} for {url}. "
-            f"Response text: {response.text} "
-            f"Sleeping for {time_to_pause} seconds."
+            f"Response text: {response.text}"
         )
-        time.sleep(time_to_pause)
-        return make_github_request(url, session, headers, attempt_num + 1)
+        return None
 
     return response
 
@@ -123,6 +224,7 @@ def make_github_request(url, session, headers, attempt_num=1):
 def main():
     codebase_root = str(git_codebase_root())
     github_df_file_path = codebase_root + "/data/github_df.csv"
+    github_cache_path = codebase_root + "/data/github_cache"
     logger.info(f" github_df_file_path is : { github_df_file_path}")
 
     # Accessing the environmental variable (PAT)
@@ -137,6 +239,21 @@ def main():
     # Make the authenticated request
     headers = {"Authorization": f"token {pat}", "X-GitHub-Api-Version": "2022-11-28"}
 
+    # The sessions are shared by all the requests so that the connection to
+    # the API is reused, and so that the rate limits apply across repositories
+    # rather than to each call. Code search has a separate (and much lower)
+    # rate limit to the rest of the API, hence a session for each.
+    search_client = GitHubClient(
+        create_github_session(
+            headers, github_cache_path, per_minute=SEARCH_REQUESTS_PER_MINUTE
+        )
+    )
+    commit_client = GitHubClient(
+        create_github_session(
+            headers, github_cache_path, per_minute=CORE_REQUESTS_PER_MINUTE
+        )
+    )
+
     if os.path.exists(github_df_file_path):
         logger.info(f"Found existing file at: {github_df_file_path}")
         github_df = pd.read_csv(github_df_file_path)
@@ -150,19 +267,17 @@ def main():
         # Loading the dataframe
         github_df = load_data(data_path)
 
-        # Some of the URLs end with "/". I need to remove them.
-        github_df["repourl"] = github_df["repourl"].str.rstrip("/")
+        # Normalise the URLs before removing duplicates so that, e.g., URLs
+        # with and without a trailing "/" are recognised as the same repo.
+        # GitHub's owner and repository names are case insensitive. Rows
+        # without a URL aren't duplicates of each other, so are all kept.
+        github_df["repourl"] = normalise_repo_urls(github_df["repourl"])
+        repourls = github_df["repourl"].str.lower()
+        github_df = github_df[~(repourls.notna() & repourls.duplicated())]
         github_df.to_csv(github_df_file_path, index=False)
 
-    # replace http with https
-    github_df["repourl"] = github_df["repourl"].str.replace(
-        r"^http\b", "https", regex=True
-    )
-
-    # replace www.github.com with github.com
-    github_df["repourl"] = github_df["repourl"].str.replace(
-        r"https?://(www\.)?", "https://", regex=True
-    )
+    # Files written by earlier versions of this script were not normalised
+    github_df["repourl"] = normalise_repo_urls(github_df["repourl"])
 
     if "testfilecount" not in github_df.columns:
         logger.info(
@@ -178,15 +293,36 @@ def main():
             f" process."
         )
 
+    # Test file counts found during this run, by repository, so that a
+    # repository listed more than once is only searched once
+    test_file_counts = {}
+
     for index, row in github_df.iterrows():
         if github_df.loc[index, "testfilecount"] == -1:
             repourl = row["repourl"]
+            if pd.isna(repourl):
+                logger.warning(f"Skipping row {index}, which has no repourl")
+                continue
             logger.info(f"Analysing repo {repourl}")
             repo_path = extract_owner_and_repo_names(repourl)
-            sha, html_url = get_latest_commit_info(repo_path, headers)
+            if repo_path.lower() in test_file_counts:
+                logger.info(f"Reusing the test file count for {repo_path}")
+                github_df.at[index, "testfilecount"] = test_file_counts[
+                    repo_path.lower()
+                ]
+                github_df.to_csv(github_df_file_path, index=False)
+                continue
+
+            sha, html_url = get_latest_commit_info(repo_path, commit_client)
             logger.info(f"Latest git commit {sha} at {html_url}")
             # TODO save in the data array
-            test_file_count = get_test_file_count(repo_path, headers)
+            test_file_count = get_test_file_count(repo_path, search_client)
+            if test_file_count == -1:
+                # Leave the row to be processed again by the next run
+                logger.warning(f"Could not count the test files for {repo_path}")
+                continue
+
+            test_file_counts[repo_path.lower()] = test_file_count
             github_df.at[index, "testfilecount"] = test_file_count
             github_df.to_csv(github_df_file_path, index=False)
         else:
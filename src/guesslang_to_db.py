@@ -21,7 +21,12 @@ from loguru import logger
 from tqdm import tqdm
 from guesslang import Guess
 
-from supabase_db_interactions import read_from_db, write_to_db
+from supabase_db_interactions import (
+    configure_logging,
+    flush_to_db,
+    read_from_db,
+    write_to_db,
+)
 from utils.git_utils import get_working_directory_or_git_root
 
 # Configure logger
@@ -49,6 +54,15 @@ def parse_args():
         help="Directory where repositories are cloned. Defaults to "
         "'data/cloned_repo' within the project's root directory.",
     )
+    parser.add_argument(
+        "--db-logfile-path",
+        type=str,
+        default=str(
+            Path(get_working_directory_or_git_root()) / "supabase" / "write_to_db.log"
+        ),
+        help="Path to the logfile of the database interactions. Defaults to "
+        "'supabase/write_to_db.log' within the project's root directory.",
+    )
     return parser.parse_args()
 
 
@@ -101,7 +115,8 @@ def extract_languages(cloned_repos_base_path, processed_files):
     3. For each repository, identify the files.
     4. For each file, detect the programming language if the file has not been
     processed.
-    5. Write the detected language and file details to the database.
+    5. Write the detected language and file details to the database (the
+    records are inserted in batches; see `write_to_db`).
 
     The function logs information at various steps to provide insight into the
      progress and any potential issues.
@@ -159,6 +174,7 @@ def extract_languages(cloned_repos_base_path, processed_files):
 
 if __name__ == "__main__":
     args = parse_args()
+    configure_logging(args.db_logfile_path)
 
     # Base path to the cloned repositories
     cloned_repos_base_path = args.clone_dir
@@ -174,5 +190,6 @@ if __name__ == "__main__":
     # Extract languages from the cloned repositories
     logger.info("Extracting languages from cloned repositories")
     extract_languages(cloned_repos_base_path, processed_files)
+    flush_to_db()
 
     logger.info("Script execution finished successfully.")
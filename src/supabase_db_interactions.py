@@ -5,18 +5,37 @@ This script demonstrates how to interact with a Supabase database using Python.
 It utilises the `dotenv` library to load environment variables
 from a `.env` file and the `supabase-py` library to perform database operations.
 The script includes functions to write data to and read data from a Supabase
-table.
+table. Rows written with `write_to_db` are buffered and inserted in batches;
+call `flush_to_db` to insert any remaining rows (this is also done
+automatically when the interpreter exits).
+
+The Supabase client is created when it's first needed (see `get_client`), so
+importing this module has no side effects.
+
+In offline mode the records are appended to a local JSON Lines file instead
+of being inserted, so a bulk run makes no requests to the database. The file
+is uploaded afterwards, in batches, with `--upload-offline-file`.
 
 Argparse Parameters:
 - --logfile-path: Path to the logfile. Defaults to "supabase/write_to_db.log"
 in the working directory or git root.
+- --upload-offline-file: Insert the records saved in offline mode into the
+database, then delete the file.
 
 Environment Variables:
 - SUPABASE_URL: The URL of the Supabase instance.
 - SUPABASE_KEY: The API key for accessing the Supabase instance.
+- SUPABASE_OFFLINE: Set to 1 to enable offline mode.
+- SUPABASE_OFFLINE_FILE: Path to the file used in offline mode. Defaults to
+"supabase/guessed_languages.jsonl" in the working directory or git root.
 
 """
 
+import atexit
+import csv
+import functools
+import io
+import json
 import os
 import platform
 import logging
@@ -39,43 +58,107 @@ def parse_args():
         ),
         help="Path to the logfile",
     )
+    parser.add_argument(
+        "--upload-offline-file",
+        action="store_true",
+        help="Insert the records saved in offline mode into the database",
+    )
     return parser.parse_args()
 
 
-args = parse_args()
-log_file_path = args.logfile_path
+def configure_logging(log_file_path):
+    """
+    Configures logging to the given file.
 
+    This is done by the scripts that use this module rather than on import, so
+    importing it doesn't parse the importing script's arguments.
 
-# Configure logging
-logging.basicConfig(
-    filename=log_file_path,
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-)
+    Parameters:
+        log_file_path (str): Path to the logfile.
+    """
+    logging.basicConfig(
+        filename=log_file_path,
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+    )
+    logging.info(f"Logfile wil be saved in : {log_file_path}")
 
 
-logging.info(f"Logfile wil be saved in : {log_file_path}")
+@functools.cache
+def get_client() -> Client:
+    """
+    Creates the Supabase client on first use, and returns the same client
+    afterwards.
 
-# Load environment variables from .env file
-load_dotenv()
+    Returns:
+        Client: The Supabase client.
+
+    Raises:
+        EnvironmentError: If SUPABASE_URL or SUPABASE_KEY is not set.
+    """
+    # Load environment variables from .env file
+    load_dotenv()
+
+    # Project Settings -> API
+    supabase_url = os.getenv("SUPABASE_URL")
 
-# Project Settings -> API
-SUPABASE_URL = os.getenv("SUPABASE_URL")
+    # Project Settings -> API -> Project API keys
+    supabase_key = os.getenv("SUPABASE_KEY")
 
-# Project Settings -> API -> Project API keys
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+    # Check if all the required environment variables are set
+    required_env_vars = {"SUPABASE_URL": supabase_url, "SUPABASE_KEY": supabase_key}
+    missing_vars = [name for name, value in required_env_vars.items() if not value]
 
-# Check if all the required environment variables are set
-required_env_vars = [SUPABASE_URL, SUPABASE_KEY]
-missing_vars = [var for var in required_env_vars if not os.getenv(var)]
+    if missing_vars:
+        raise EnvironmentError(
+            f"Missing required environment variables: {', '.join(missing_vars)}"
+        )
+
+    # Initialising the Supabase client
+    return create_client(supabase_url, supabase_key)
+
+
+def is_offline():
+    """
+    Checks whether offline mode is enabled with the SUPABASE_OFFLINE
+    environment variable.
 
-if missing_vars:
-    raise EnvironmentError(
-        f"Missing required environment variables: {', '.join(missing_vars)}"
+    Returns:
+        bool: True if records are saved to a local file instead of the database.
+    """
+    load_dotenv()
+    return os.getenv("SUPABASE_OFFLINE") == "1"
+
+
+def get_offline_file_path():
+    """
+    Returns the path of the JSON Lines file used in offline mode.
+
+    Returns:
+        Path: The value of SUPABASE_OFFLINE_FILE, or
+        "supabase/guessed_languages.jsonl" in the working directory or git root.
+    """
+    load_dotenv()
+    offline_file_path = os.getenv("SUPABASE_OFFLINE_FILE")
+    if offline_file_path:
+        return Path(offline_file_path)
+    return (
+        Path(get_working_directory_or_git_root())
+        / "supabase"
+        / "guessed_languages.jsonl"
     )
 
-# Initialising the Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+# Number of rows to insert into the database in one request
+WRITE_BATCH_SIZE = 1000
+
+# Number of rows to read from the database in one request. This must not be
+# more than the `max_rows` limit of the API (see supabase/config.toml), or
+# reading would stop after the first page.
+READ_PAGE_SIZE = 1000
+
+# Rows written with `write_to_db` that haven't been inserted yet
+_pending = []
 
 
 def write_to_db(
@@ -84,6 +167,12 @@ def write_to_db(
     """
     Writes a new record to the 'guessed_languages' table in the Supabase
     database.
+
+    The record is added to a buffer, which is inserted into the table in a
+    single request once it holds `WRITE_BATCH_SIZE` records (see
+    `flush_to_db`). In offline mode the buffer is appended to the offline file
+    instead.
+
     Parameters:
         hosting_provider (str): The hosting provider of the repository.
         repo_name (str): The name of the repository.
@@ -94,22 +183,96 @@ def write_to_db(
     """
     if hostname is None:
         hostname = platform.node()
+
+    # Define data to be inserted
+    data = {
+        "hosting_provider": hosting_provider,
+        "repo_name": repo_name,
+        "file_path": file_path,
+        "guessed_language": guessed_language,
+        "hostname": hostname,
+    }
+    _pending.append(data)
+    logging.debug(f"Queued data for insertion: {data}")
+
+    if len(_pending) >= WRITE_BATCH_SIZE:
+        flush_to_db()
+
+
+def flush_to_db():
+    """
+    Inserts the records buffered by `write_to_db` into the 'guessed_languages'
+    table, in a single request. In offline mode they are appended to the
+    offline file instead, one JSON object per line.
+
+    If the insert fails the error is logged and the records are discarded;
+    as their files aren't in the database they will be processed again by
+    the next run.
+    """
+    if not _pending:
+        return
+
     try:
-        # Define data to be inserted
-        data = {
-            "hosting_provider": hosting_provider,
-            "repo_name": repo_name,
-            "file_path": file_path,
-            "guessed_language": guessed_language,
-            "hostname": hostname,
-        }
-        supabase.table("guessed_languages").insert(data).execute()
+        if is_offline():
+            offline_file_path = get_offline_file_path()
+            with open(offline_file_path, "a", encoding="utf-8") as file:
+                file.writelines(json.dumps(record) + "\n" for record in _pending)
+            logging.info(f"Saved {len(_pending)} records to {offline_file_path}")
+            return
+
+        get_client().table("guessed_languages").insert(_pending).execute()
 
         # Log the successful data insertion
-        logging.info("'Data inserted successfully'")
+        logging.info(f"Inserted {len(_pending)} records successfully")
+
+    except Exception as error:
+        logging.error(f"Error inserting {len(_pending)} records: {error}")
+
+    finally:
+        _pending.clear()
+
+
+# Insert any remaining records when the script finishes
+atexit.register(flush_to_db)
+
+
+def read_offline_file():
+    """
+    Reads the records saved to the offline file in offline mode.
+
+    Returns:
+        list: The records, or an empty list if there is no offline file.
+    """
+    offline_file_path = get_offline_file_path()
+    if not offline_file_path.exists():
+        return []
+
+    with open(offline_file_path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def upload_offline_file():
+    """
+    Inserts the records saved to the offline file into the 'guessed_languages'
+    table, `WRITE_BATCH_SIZE` records per request, then deletes the file.
+
+    If an insert fails the error is logged and raised, and the file is kept so
+    the upload can be run again. Records inserted before the failure would
+    then be inserted twice, which the `distinct_guessed_file_paths` view
+    tolerates.
+    """
+    records = read_offline_file()
+    try:
+        for start in range(0, len(records), WRITE_BATCH_SIZE):
+            batch = records[start : start + WRITE_BATCH_SIZE]
+            get_client().table("guessed_languages").insert(batch).execute()
+        logging.info(f"Uploaded {len(records)} records from the offline file")
 
     except Exception as error:
-        logging.error(f"Error: {error}")
+        logging.error(f"Error uploading the offline file: {error}")
+        raise
+
+    get_offline_file_path().unlink(missing_ok=True)
 
 
 def read_from_db():
@@ -117,20 +280,51 @@ def read_from_db():
     Reads and returns distinct file paths from the 'guessed_languages' table in
     the Supabase database.
 
+    The file paths are read from the `distinct_guessed_file_paths` view (see
+    supabase/DDL.sql), so duplicates are removed by the database. They are
+    read a page of `READ_PAGE_SIZE` rows at a time, as the API returns at
+    most `max_rows` rows per request. Each page is requested as CSV rather
+    than JSON, which is quicker to parse and doesn't build a dictionary for
+    every row. In offline mode they are read from the offline file instead.
+
     Returns:
         set: A set of distinct file paths.
     """
-    try:
-        # Query the distinct file_path values from the guessed_languages table
-        response = supabase.table("guessed_languages").select("file_path").execute()
+    if is_offline():
+        return {record["file_path"] for record in read_offline_file()}
 
-        # Check if response.data is empty and handle it
-        if not response.data:
+    try:
+        file_paths = set()
+        offset = 0
+        while True:
+            # Query the next page of distinct file_path values. The pages are
+            # ordered so that consecutive ranges don't overlap or skip rows.
+            response = (
+                get_client()
+                .table("distinct_guessed_file_paths")
+                .select("file_path")
+                .order("file_path")
+                .range(offset, offset + READ_PAGE_SIZE - 1)
+                .csv()
+                .execute()
+            )
+
+            # The response is the CSV text, starting with a header row. Each
+            # following row holds a single file_path value. If there are no
+            # rows the response is empty, and postgrest sets the data to an
+            # empty list rather than an empty string.
+            rows = csv.reader(io.StringIO(response.data or ""))
+            next(rows, None)  # Skip the header
+            page = [row[0] for row in rows]
+            file_paths.update(page)
+
+            if len(page) < READ_PAGE_SIZE:
+                break
+            offset += READ_PAGE_SIZE
+
+        # Check if no file paths were found and handle it
+        if not file_paths:
             logging.info("No records found in the 'guessed_languages' table.")
-            return set()
-
-        # Extract the file_path values and return them as a set
-        file_paths = set(record["file_path"] for record in response.data)
 
         return file_paths
 
@@ -140,6 +334,12 @@ def read_from_db():
 
 
 if __name__ == "__main__":
+    args = parse_args()
+    configure_logging(args.logfile_path)
+
+    if args.upload_offline_file:
+        upload_offline_file()
+
     # Read the distinct file_path values
     processed_files = read_from_db()
     logging.info(f"Processed files: {processed_files}")
@@ -27,4 +27,12 @@ $$ LANGUAGE plpgsql
 CREATE TRIGGER update_date_updated_trigger
 BEFORE UPDATE ON guessed_languages
 FOR EACH ROW
-EXECUTE FUNCTION update_date_updated_column()
\ No newline at end of file
+EXECUTE FUNCTION update_date_updated_column()
+
+
+-- Created a view `distinct_guessed_file_paths` of the distinct file paths in
+-- the `guessed_languages` table, so that the DISTINCT is computed by the
+-- database and only one row per file path is sent to the client.
+CREATE VIEW distinct_guessed_file_paths AS
+SELECT DISTINCT file_path
+FROM guessed_languages
@@ -26,10 +26,14 @@ from pathlib import Path
 import pandas as pd
 from loguru import logger
 
-from src.github_repo_request_local import detect_test_runners, detect_test_runners2
+from src.github_repo_request_local import (
+    detect_test_runners,
+    detect_test_runners2,
+    get_clone_dir,
+    get_domain_dir,
+)
 from utils.git_utils import get_working_directory_or_git_root
 from utils.measure_performance import measure_performance, performance_records
-from utils.string_utils import sanitise_directory_name
 
 
 def parse_args():
@@ -74,7 +78,7 @@ def parse_args():
     return parser.parse_args()
 
 
-def analyse_with_test_runner(df, test_runner_function, repo_root):
+def analyse_with_test_runner(df, test_runner_function, clone_dir_base):
     """
     Analyses the performance of a specified test runner function applied to
     each repository described in the DataFrame. It records performance metrics
@@ -84,7 +88,8 @@ def analyse_with_test_runner(df, test_runner_function, repo_root):
         df (pd.DataFrame): DataFrame containing repositories' data.
         test_runner_function (Callable): Function to be applied for
         performance analysis.
-        repo_root (Path): Root directory for cloning repositories.
+        clone_dir_base (Path): The directory the repositories are cloned
+        into.
 
     """
     performance_data = []
@@ -93,10 +98,8 @@ def analyse_with_test_runner(df, test_runner_function, repo_root):
         if row["clone_status"] != "successful":
             continue
         repo_url = row["repourl"]
-        repo_domain = row["repodomain"]
-        sanitised_domain = sanitise_directory_name(repo_domain)
-        repo_name = Path(repo_url.split("/")[-1]).stem
-        clone_dir = repo_root / Path(args.clone_dir) / sanitised_domain / repo_name
+        domain_dir = get_domain_dir(clone_dir_base, row["repodomain"])
+        clone_dir = get_clone_dir(domain_dir, repo_url)
 
         # Measure the performance of the test runner function
         _ = measure_performance(test_runner_function, clone_dir)
@@ -123,40 +126,41 @@ def analyse_with_test_runner(df, test_runner_function, repo_root):
     return performance_df
 
 
-args = parse_args()
-input_file = args.input_file
-output_file1 = args.output_file1
-output_file2 = args.output_file2
-combined_df_file = args.output_file3
-repo_root = get_working_directory_or_git_root()
-logger.info(f"repo_root is: {repo_root}")
-
-df = pd.read_csv(repo_root / input_file)
-
-logger.info("Performance analysis using the function: detect_test_runners ")
-performance_df1 = analyse_with_test_runner(df, detect_test_runners, repo_root)
-performance_df1.to_csv(repo_root / output_file1, index=False)
-logger.info(
-    f"Performance analysis result(performance_df1.csv) using the function "
-    f"`detect_test_runners` is saved in {repo_root / output_file1}"
-)
-
-logger.info("Performance analysis using the function: detect_test_runners2 ")
-performance_df2 = analyse_with_test_runner(df, detect_test_runners2, repo_root)
-performance_df2.to_csv(repo_root / output_file2, index=False)
-logger.info(
-    f"Performance analysis result(performance_df2.csv) using the function"
-    f" `detect_test_runners2` is saved in {repo_root / output_file2}"
-)
+if __name__ == "__main__":
+    args = parse_args()
+    input_file = args.input_file
+    output_file1 = args.output_file1
+    output_file2 = args.output_file2
+    combined_df_file = args.output_file3
+    repo_root = get_working_directory_or_git_root()
+    logger.info(f"repo_root is: {repo_root}")
+    clone_dir_base = repo_root / Path(args.clone_dir)
+
+    df = pd.read_csv(repo_root / input_file)
+
+    logger.info("Performance analysis using the function: detect_test_runners ")
+    performance_df1 = analyse_with_test_runner(df, detect_test_runners, clone_dir_base)
+    performance_df1.to_csv(repo_root / output_file1, index=False)
+    logger.info(
+        f"Performance analysis result(performance_df1.csv) using the function "
+        f"`detect_test_runners` is saved in {repo_root / output_file1}"
+    )
 
+    logger.info("Performance analysis using the function: detect_test_runners2 ")
+    performance_df2 = analyse_with_test_runner(df, detect_test_runners2, clone_dir_base)
+    performance_df2.to_csv(repo_root / output_file2, index=False)
+    logger.info(
+        f"Performance analysis result(performance_df2.csv) using the function"
+        f" `detect_test_runners2` is saved in {repo_root / output_file2}"
+    )
 
-# Optionally, combine and save the performance data
-combined_performance_df = pd.concat(
-    [performance_df1, performance_df2], ignore_index=True
-)
-combined_performance_df.to_csv(repo_root / args.output_file3, index=False)
-logger.info(
-    f"Concatenated dataframes produced by analysing the performance of "
-    f"functions `detect_test_runners` and `detect_test_runners2` is saved in"
-    f" {repo_root / args.output_file3}"
-)
+    # Optionally, combine and save the performance data
+    combined_performance_df = pd.concat(
+        [performance_df1, performance_df2], ignore_index=True
+    )
+    combined_performance_df.to_csv(repo_root / args.output_file3, index=False)
+    logger.info(
+        f"Concatenated dataframes produced by analysing the performance of "
+        f"functions `detect_test_runners` and `detect_test_runners2` is saved in"
+        f" {repo_root / args.output_file3}"
+    )
@@ -0,0 +1,36 @@
+from src import github_repo_request_local
+from src.github_repo_request_local import delete_clones
+
+
+def test_deletes_only_the_given_clones(tmp_path):
+    clone_dirs = [tmp_path / "local" / name for name in ["alpha", "beta"]]
+    kept_dir = tmp_path / "local" / "gamma"
+    for directory in [*clone_dirs, kept_dir]:
+        (directory / ".git").mkdir(parents=True)
+        (directory / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+
+    delete_clones(clone_dirs)
+
+    assert not any(clone_dir.exists() for clone_dir in clone_dirs)
+    assert kept_dir.exists()
+
+
+def test_ignores_missing_clones(tmp_path):
+    delete_clones([tmp_path / "missing"])
+
+    assert not (tmp_path / "missing").exists()
+
+
+def test_deletes_with_the_given_number_of_workers(tmp_path, monkeypatch):
+    worker_counts = []
+    executor_class = github_repo_request_local.ThreadPoolExecutor
+
+    def record_workers(max_workers):
+        worker_counts.append(max_workers)
+        return executor_class(max_workers=max_workers)
+
+    monkeypatch.setattr(github_repo_request_local, "ThreadPoolExecutor", record_workers)
+
+    delete_clones([tmp_path / "missing"], max_workers=3)
+
+    assert worker_counts == [3]
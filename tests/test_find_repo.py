@@ -0,0 +1,20 @@
+from src.find_repo import git_codebase_root
+
+
+def test_finds_the_root_of_the_repository(tmp_path):
+    (tmp_path / "repo" / ".git").mkdir(parents=True)
+    (tmp_path / "repo" / "src").mkdir()
+
+    assert git_codebase_root(str(tmp_path / "repo" / "src" / "app.py")) == (
+        tmp_path / "repo"
+    )
+
+
+def test_finds_a_repository_initialised_after_a_failed_lookup(tmp_path):
+    file_path = str(tmp_path / "repo" / "app.py")
+    (tmp_path / "repo").mkdir()
+    assert git_codebase_root(file_path) is None
+
+    (tmp_path / "repo" / ".git").mkdir()
+
+    assert git_codebase_root(file_path) == tmp_path / "repo"
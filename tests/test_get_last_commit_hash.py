@@ -0,0 +1,62 @@
+import subprocess
+
+import pytest
+
+from src.github_repo_request_local import get_last_commit_hash, read_head_commit_hash
+
+
+def git(repo_dir, *args):
+    result = subprocess.run(
+        ["git", "-C", str(repo_dir), *args],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout.strip()
+
+
+@pytest.fixture
+def repo_dir(tmp_path):
+    git(tmp_path, "init", "--quiet")
+    (tmp_path / "README.md").write_text("Hello\n")
+    git(tmp_path, "add", "README.md")
+    git(
+        tmp_path,
+        "-c",
+        "user.name=Test",
+        "-c",
+        "user.email=test@example.com",
+        "commit",
+        "--quiet",
+        "-m",
+        "Initial commit",
+    )
+    return tmp_path
+
+
+def test_reads_the_hash_of_the_checked_out_branch(repo_dir):
+    assert read_head_commit_hash(repo_dir) == git(repo_dir, "rev-parse", "HEAD")
+
+
+def test_reads_the_hash_from_packed_refs(repo_dir):
+    git(repo_dir, "pack-refs", "--all")
+
+    assert read_head_commit_hash(repo_dir) == git(repo_dir, "rev-parse", "HEAD")
+
+
+def test_reads_the_hash_of_a_detached_head(repo_dir):
+    git(repo_dir, "checkout", "--quiet", "--detach")
+
+    assert read_head_commit_hash(repo_dir) == git(repo_dir, "rev-parse", "HEAD")
+
+
+def test_returns_none_without_a_git_directory(tmp_path):
+    assert read_head_commit_hash(tmp_path) is None
+
+
+def test_get_last_commit_hash_falls_back_to_git(repo_dir, monkeypatch):
+    monkeypatch.setattr(
+        "src.github_repo_request_local.read_head_commit_hash", lambda _: None
+    )
+
+    assert get_last_commit_hash(repo_dir) == git(repo_dir, "rev-parse", "HEAD")
@@ -0,0 +1,108 @@
+import pytest
+from utils.github_client import GitHubClient
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None, text=""):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = text
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url))
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # A clock that starts at 1000 and only moves forward when sleeping
+    now = [1000]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    monkeypatch.setattr("utils.github_client.time.sleep", sleep)
+    monkeypatch.setattr("utils.github_client.time.time", lambda: now[0])
+    return sleeps
+
+
+def test_returns_successful_response(sleeps):
+    response = FakeResponse(
+        headers={"X-RateLimit-Remaining": "4999", "X-RateLimit-Reset": "1060"}
+    )
+    client = GitHubClient(FakeSession([response]))
+
+    assert client.get("https://api.github.com/repos/owner/repo") is response
+    assert client.remaining == 4999
+    assert client.reset_at == 1060
+    assert sleeps == []
+
+
+def test_retries_secondary_rate_limit_using_retry_after(sleeps):
+    rate_limited = FakeResponse(
+        status_code=403,
+        headers={"Retry-After": "30"},
+        text="You have exceeded a secondary rate limit.",
+    )
+    ok = FakeResponse()
+    session = FakeSession([rate_limited, ok])
+
+    assert GitHubClient(session).get("https://api.github.com/search/code") is ok
+    assert len(session.requests) == 2
+    assert sleeps == [30.0]
+
+
+def test_waits_for_reset_when_primary_rate_limit_is_used_up(sleeps):
+    used_up = FakeResponse(
+        status_code=403,
+        headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1100"},
+        text="API rate limit exceeded",
+    )
+    ok = FakeResponse()
+    client = GitHubClient(FakeSession([used_up, ok]))
+
+    assert client.get("https://api.github.com/repos/owner/repo") is ok
+    assert sleeps == [101]
+
+
+def test_backs_off_exponentially_on_429(sleeps):
+    session = FakeSession([FakeResponse(status_code=429)] * 3 + [FakeResponse()])
+
+    GitHubClient(session).post("https://api.github.com/graphql")
+    assert sleeps == [2, 4, 8]
+
+
+def test_does_not_retry_other_errors(sleeps):
+    not_found = FakeResponse(status_code=404, text="Not Found")
+    session = FakeSession([not_found])
+
+    assert GitHubClient(session).get("https://api.github.com/repos/x/y") is not_found
+    assert sleeps == []
+
+
+def test_gives_up_after_max_attempts(sleeps):
+    session = FakeSession([FakeResponse(status_code=429)] * 3)
+
+    response = GitHubClient(session, max_attempts=3).get("https://api.github.com")
+    assert response.status_code == 429
+    assert len(session.requests) == 3
+
+
+def test_waits_before_sending_when_few_requests_remain(sleeps):
+    low = FakeResponse(
+        headers={"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": "1200"}
+    )
+    client = GitHubClient(FakeSession([low, FakeResponse()]), min_remaining=50)
+
+    client.get("https://api.github.com/a")
+    assert sleeps == []
+    client.get("https://api.github.com/b")
+    assert sleeps == [200]
@@ -0,0 +1,128 @@
+import pandas as pd
+
+from src import github_repo_requests
+from src.github_repo_requests import create_github_session, get_test_file_count
+
+SEARCH_URL = "https://api.github.com/search/code"
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, json_data=None, links=None):
+        self.status_code = status_code
+        self.json_data = json_data
+        self.links = links or {}
+        self.text = ""
+
+    def json(self):
+        return self.json_data
+
+
+class FakeClient:
+    """Returns a response for each page of the search results, and a commit."""
+
+    def __init__(self, search_pages):
+        self.search_pages = search_pages
+
+    def get(self, url):
+        if url.startswith(SEARCH_URL):
+            page = int(url.rpartition("&page=")[2])
+            return self.search_pages[page - 1]
+        return FakeResponse(json_data=[{"sha": "abc123", "html_url": url}])
+
+
+def search_page(names, has_next):
+    links = {"next": {"url": "next"}} if has_next else {}
+    items = [{"name": name, "path": f"tests/{name}"} for name in names]
+    return FakeResponse(json_data={"items": items}, links=links)
+
+
+def test_counts_test_files_across_pages():
+    client = FakeClient(
+        [
+            search_page(["test_a.py", "test_b.py"], True),
+            search_page(["test_c.py"], False),
+        ]
+    )
+
+    assert get_test_file_count("owner/repo", client) == 3
+
+
+def test_returns_minus_one_when_a_page_fails():
+    client = FakeClient([search_page(["test_a.py"], True), FakeResponse(502)])
+
+    assert get_test_file_count("owner/repo", client) == -1
+
+
+def test_failed_page_leaves_the_row_to_process(tmp_path, monkeypatch):
+    (tmp_path / "data").mkdir()
+    pd.DataFrame({"repourl": ["https://github.com/owner/repo"]}).to_csv(
+        tmp_path / "data" / "original_github_df.csv", index=False
+    )
+    client = FakeClient([search_page(["test_a.py"], True), FakeResponse(502)])
+    monkeypatch.setenv("MY_PAT", "token")
+    monkeypatch.setattr(github_repo_requests, "git_codebase_root", lambda: tmp_path)
+    monkeypatch.setattr(
+        github_repo_requests, "create_github_session", lambda *a, **kw: None
+    )
+    monkeypatch.setattr(github_repo_requests, "GitHubClient", lambda session: client)
+
+    github_df = github_repo_requests.main()
+
+    assert github_df["testfilecount"].tolist() == [-1]
+
+
+def test_keeps_each_row_without_a_url(tmp_path, monkeypatch):
+    (tmp_path / "data").mkdir()
+    pd.DataFrame(
+        {
+            "repourl": [
+                None,
+                "https://github.com/owner/repo",
+                None,
+                "https://github.com/Owner/Repo/",
+            ]
+        }
+    ).to_csv(tmp_path / "data" / "original_github_df.csv", index=False)
+    client = FakeClient([search_page(["test_a.py"], False)])
+    monkeypatch.setenv("MY_PAT", "token")
+    monkeypatch.setattr(github_repo_requests, "git_codebase_root", lambda: tmp_path)
+    monkeypatch.setattr(
+        github_repo_requests, "create_github_session", lambda *a, **kw: None
+    )
+    monkeypatch.setattr(github_repo_requests, "GitHubClient", lambda session: client)
+
+    github_df = github_repo_requests.main()
+
+    assert github_df["repourl"].isna().sum() == 2
+    assert github_df["testfilecount"].tolist() == [-1, 1, -1]
+
+
+def test_only_code_search_uses_its_lower_rate_limit(tmp_path, monkeypatch):
+    (tmp_path / "data").mkdir()
+    pd.DataFrame({"repourl": []}).to_csv(
+        tmp_path / "data" / "original_github_df.csv", index=False
+    )
+    rates = []
+    monkeypatch.setenv("MY_PAT", "token")
+    monkeypatch.setattr(github_repo_requests, "git_codebase_root", lambda: tmp_path)
+    monkeypatch.setattr(
+        github_repo_requests,
+        "create_github_session",
+        lambda headers, cache_name, per_minute: rates.append(per_minute),
+    )
+    monkeypatch.setattr(github_repo_requests, "GitHubClient", lambda session: None)
+
+    github_repo_requests.main()
+
+    assert rates == [
+        github_repo_requests.SEARCH_REQUESTS_PER_MINUTE,
+        github_repo_requests.CORE_REQUESTS_PER_MINUTE,
+    ]
+
+
+def test_session_retries_server_errors(tmp_path):
+    session = create_github_session({}, str(tmp_path / "cache"))
+
+    retries = session.get_adapter("https://api.github.com").max_retries
+    assert retries.total == 5
+    assert 503 in retries.status_forcelist
@@ -0,0 +1,79 @@
+from src.github_repo_request_local import list_test_files
+
+
+def create_files(directory, paths):
+    for path in paths:
+        file_path = directory / path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text("")
+
+
+def test_lists_files_named_like_tests(tmp_path):
+    create_files(tmp_path, ["test_app.py", "app_test.go", "app.py", "README.md"])
+
+    result = list_test_files(tmp_path, {".md"})
+
+    assert sorted(result) == [
+        str(tmp_path / "app_test.go"),
+        str(tmp_path / "test_app.py"),
+    ]
+
+
+def test_lists_files_in_test_directories(tmp_path):
+    create_files(
+        tmp_path,
+        ["tests/helpers.py", "tests/unit/models.py", "src/models.py"],
+    )
+
+    result = list_test_files(tmp_path, set())
+
+    assert sorted(result) == [
+        str(tmp_path / "tests" / "helpers.py"),
+        str(tmp_path / "tests" / "unit" / "models.py"),
+    ]
+
+
+def test_excludes_extensions(tmp_path):
+    create_files(
+        tmp_path, ["tests/data.json", "tests/notes.txt", "tests/test_api.py"]
+    )
+
+    result = list_test_files(tmp_path, {".json", ".txt"})
+
+    assert result == [str(tmp_path / "tests" / "test_api.py")]
+
+
+def test_excludes_extensions_whatever_their_case(tmp_path):
+    create_files(tmp_path, ["tests/README.MD", "tests/Notes.Txt", "tests/Test.py"])
+
+    result = list_test_files(tmp_path, {".md", ".txt"})
+
+    assert result == [str(tmp_path / "tests" / "Test.py")]
+
+
+def test_does_not_follow_symlinked_directories(tmp_path):
+    create_files(tmp_path, ["repo/src/app.py", "outside/tests/test_outside.py"])
+    (tmp_path / "repo" / "linked").symlink_to(tmp_path / "outside")
+
+    assert list_test_files(tmp_path / "repo", set()) == []
+
+
+def test_ignores_test_in_the_path_to_the_directory(tmp_path):
+    # e.g. a clone directory within a checkout named 'commercetest'
+    create_files(tmp_path, ["commercetest/repo/app.py"])
+
+    assert list_test_files(tmp_path / "commercetest" / "repo", set()) == []
+
+
+def test_skips_dependency_and_cache_directories(tmp_path):
+    create_files(
+        tmp_path,
+        [
+            "tests/test_app.py",
+            "tests/__pycache__/test_app.cpython-311.pyc",
+            "node_modules/lib/test/index.js",
+            ".git/hooks/pre-commit",
+        ],
+    )
+
+    assert list_test_files(tmp_path, set()) == [str(tmp_path / "tests" / "test_app.py")]
@@ -0,0 +1,409 @@
+import ast
+import sys
+import textwrap
+
+import pytest
+
+from src.DS import metrics_extraction
+from src.DS.metrics_extraction import (
+    CACHE_VERSION,
+    analyse_file,
+    analyse_one,
+    count_lines,
+    get_file_version,
+    iter_analysis_results,
+    iter_statements,
+    looks_like_test_file,
+    parse_args,
+)
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_path(tmp_path, monkeypatch):
+    # The files are referred to by relative paths, as the name of the
+    # temporary directory starts with 'test' and so would look like a test
+    # directory
+    monkeypatch.chdir(tmp_path)
+
+
+def create_file(directory, path, source):
+    file_path = directory / path
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    file_path.write_text(textwrap.dedent(source))
+    return path
+
+
+class FakeExecutor:
+    """Runs the analysis in this process, recording the files analysed."""
+
+    def __init__(self):
+        self.analysed = []
+
+    def map(self, function, file_paths, chunksize=1):
+        self.analysed.extend(file_paths)
+        return map(function, file_paths)
+
+
+def test_counts_assert_statements(tmp_path):
+    file_path = create_file(
+        tmp_path,
+        "tests/test_app.py",
+        """
+        def test_add():
+            assert 1 + 1 == 2
+            for value in [1, 2]:
+                assert value > 0
+        """,
+    )
+
+    result = analyse_file(file_path)
+
+    assert result["num_test_cases"] == 1
+    assert result["num_assertions"] == 2
+
+
+def test_counts_unittest_assertion_methods(tmp_path):
+    file_path = create_file(
+        tmp_path,
+        "tests/test_app.py",
+        """
+        import unittest
+
+        class TestApp(unittest.TestCase):
+            def setUp(self):
+                self.value = 2
+
+            def test_value(self):
+                self.assertEqual(self.value, 2)
+                self.assertTrue(self.value)
+                print(self.value)
+        """,
+    )
+
+    result = analyse_file(file_path)
+
+    assert result["num_test_cases"] == 1
+    assert result["num_assertions"] == 2
+    assert result["has_setup"] is True
+    assert result["has_teardown"] is False
+
+
+def test_does_not_count_assertions_outside_test_files(tmp_path):
+    file_path = create_file(
+        tmp_path,
+        "src/app.py",
+        """
+        def test_add():
+            assert 1 + 1 == 2
+        """,
+    )
+
+    result = analyse_file(file_path)
+
+    assert result["num_test_cases"] == -1
+    assert result["num_assertions"] == -1
+
+
+# The cyclomatic complexity and number of functions of these snippets are the
+# same as `mccabe` worked them out
+@pytest.mark.parametrize(
+    "source, cyclomatic_complexity, num_functions",
+    [
+        ("def f():\n    return 1\n", 1, 1),
+        (
+            "def f(x):\n"
+            "    if x:\n"
+            "        return 1\n"
+            "    elif x > 2:\n"
+            "        return 2\n"
+            "    else:\n"
+            "        return 3\n",
+            3,
+            1,
+        ),
+        (
+            "def f(xs):\n"
+            "    for x in xs:\n"
+            "        if x:\n"
+            "            break\n"
+            "    while xs:\n"
+            "        xs.pop()\n",
+            4,
+            1,
+        ),
+        (
+            "def f():\n"
+            "    try:\n"
+            "        g()\n"
+            "    except ValueError:\n"
+            "        pass\n"
+            "    except KeyError:\n"
+            "        pass\n"
+            "    finally:\n"
+            "        h()\n",
+            4,
+            1,
+        ),
+        (
+            "async def f(xs):\n"
+            "    async for x in xs:\n"
+            "        if x:\n"
+            "            return 1\n",
+            3,
+            1,
+        ),
+        (
+            "class A:\n"
+            "    def m(self, x):\n"
+            "        if x:\n"
+            "            return 1\n"
+            "\n"
+            "    def n(self):\n"
+            "        return 2\n",
+            3,
+            2,
+        ),
+        ("x = 1\n", -1, -1),
+    ],
+)
+def test_code_metrics_match_mccabe(
+    tmp_path, source, cyclomatic_complexity, num_functions
+):
+    result = analyse_file(create_file(tmp_path, "src/app.py", source))
+
+    assert result["cyclomatic_complexity"] == cyclomatic_complexity
+    assert result["num_functions"] == num_functions
+
+
+def test_nested_functions_are_counted_as_functions(tmp_path):
+    # `mccabe` gave the same complexity but only 1 function
+    source = """
+    def f(x):
+        def g(y):
+            if y:
+                return 1
+
+        if x:
+            return g(x)
+    """
+
+    result = analyse_file(create_file(tmp_path, "src/app.py", source))
+
+    assert result["cyclomatic_complexity"] == 4
+    assert result["num_functions"] == 2
+
+
+def test_branches_outside_functions_add_one_each(tmp_path):
+    # `mccabe` counted the `if` and the `for` as functions of complexity 2
+    # each, i.e. a complexity of 4 and 2 functions
+    source = """
+    import sys
+
+    if sys.argv:
+        print(1)
+    for arg in sys.argv:
+        print(arg)
+    """
+
+    result = analyse_file(create_file(tmp_path, "src/app.py", source))
+
+    assert result["cyclomatic_complexity"] == 2
+    assert result["num_functions"] == -1
+
+
+@pytest.mark.parametrize(
+    "file_path, expected",
+    [
+        # Named like a test module
+        ("repo/test_app.py", True),
+        ("repo/tests.py", True),
+        ("repo/src/app_test.py", True),
+        ("repo/src/app_tests.py", True),
+        ("repo/conftest.py", True),
+        ("repo/src/Test_App.py", True),
+        # In a test directory, whatever the file is named
+        ("repo/tests/helpers.py", True),
+        ("repo/test/fixtures/data.py", True),
+        ("repo/testing/utils.py", True),
+        ("repo/src/unit_tests/models.py", True),
+        # Containing 'test' elsewhere in the path
+        ("repo/src/latest.py", False),
+        ("repo/attestation/verify.py", False),
+        ("repo/src/contest_results.py", False),
+        ("repo/src/app.py", False),
+    ],
+)
+def test_looks_like_test_file(file_path, expected):
+    assert looks_like_test_file(file_path) is expected
+
+
+def test_iter_statements_visits_every_statement():
+    tree = ast.parse(
+        textwrap.dedent(
+            """
+            import os
+
+            class A:
+                x = 1
+
+                def m(self, value):
+                    match value:
+                        case 1:
+                            return 1
+                        case _:
+                            pass
+
+            async def f(paths):
+                try:
+                    for path in paths:
+                        if os.path.exists(path):
+                            continue
+                        else:
+                            break
+                    else:
+                        pass
+                except OSError:
+                    raise
+                else:
+                    with open(paths[0]) as file:
+                        while file:
+                            async for line in file:
+                                del line
+                finally:
+                    return None
+            """
+        )
+    )
+
+    statements = [node for node in iter_statements(tree) if isinstance(node, ast.stmt)]
+    expected = [node for node in ast.walk(tree) if isinstance(node, ast.stmt)]
+
+    assert len(statements) == len(expected)
+    assert {id(node) for node in statements} == {id(node) for node in expected}
+
+
+def test_iter_statements_visits_except_handlers_and_match_cases():
+    tree = ast.parse(
+        textwrap.dedent(
+            """
+            try:
+                pass
+            except ValueError:
+                pass
+            match 1:
+                case 1:
+                    pass
+            """
+        )
+    )
+
+    node_types = {type(node) for node in iter_statements(tree)}
+
+    assert {ast.ExceptHandler, ast.match_case} <= node_types
+
+
+# As the lines used to be counted, with `str.splitlines`
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "x = 1",
+        "x = 1\n",
+        "x = 1\ny = 2",
+        "x = 1\n\n\ny = 2\n",
+        "x = 1\r\ny = 2\r\n",
+    ],
+)
+def test_count_lines_matches_splitlines(text):
+    assert count_lines(text.encode()) == len(text.splitlines())
+
+
+def test_analysis_results_keep_the_order_of_the_files(tmp_path):
+    file_paths = [
+        create_file(tmp_path, f"module_{name}.py", "def f():\n    pass\n")
+        for name in "abc"
+    ]
+    cached_path = file_paths[1]
+    cached_result = {"file_path": cached_path, "num_functions": 5}
+    cache = {
+        cached_path: (CACHE_VERSION, get_file_version(cached_path), cached_result)
+    }
+    executor = FakeExecutor()
+
+    results = list(iter_analysis_results(file_paths, cache, executor))
+
+    assert [result["file_path"] for result in results] == file_paths
+    assert results[1] is cached_result
+    assert executor.analysed == [file_paths[0], file_paths[2]]
+    assert cache[file_paths[0]] == (
+        CACHE_VERSION,
+        get_file_version(file_paths[0]),
+        results[0],
+    )
+
+
+@pytest.mark.parametrize(
+    "cache_entry",
+    [
+        # Cached by an earlier version of the analysis
+        lambda version: (CACHE_VERSION - 1, version, {"num_functions": 5}),
+        # Cached before the entries had a version
+        lambda version: (version, {"num_functions": 5}),
+    ],
+)
+def test_results_cached_by_another_version_are_not_reused(tmp_path, cache_entry):
+    file_path = create_file(tmp_path, "module.py", "def f():\n    pass\n")
+    cache = {file_path: cache_entry(get_file_version(file_path))}
+
+    results = list(iter_analysis_results([file_path], cache, FakeExecutor()))
+
+    assert results[0]["num_functions"] == 1
+    assert cache[file_path][0] == CACHE_VERSION
+
+
+def test_files_with_a_syntax_error_still_count_their_lines(tmp_path):
+    file_path = create_file(tmp_path, "module.py", "def f(:\n    pass\n\n")
+
+    result = analyse_one(file_path)
+
+    assert result["lines_of_code"] == 3
+    assert result["num_functions"] == -1
+    assert result["analysis_error"] == f"Could not parse file: {file_path}"
+
+
+def test_files_which_are_not_read_have_no_line_count(tmp_path):
+    file_path = create_file(tmp_path, "module.txt", "one\ntwo\n")
+
+    result = analyse_one(file_path)
+
+    assert result["lines_of_code"] == -1
+    assert result["analysis_error"] == f"Could not parse file: {file_path}"
+
+
+@pytest.mark.parametrize(
+    "format_args, output_name",
+    [
+        ([], "test_metrics_df_guesslang.csv"),
+        (["--output-format", "csv"], "test_metrics_df_guesslang.csv"),
+        (["--output-format", "parquet"], "test_metrics_df_guesslang"),
+    ],
+)
+def test_default_output_depends_on_the_format(
+    tmp_path, monkeypatch, format_args, output_name
+):
+    monkeypatch.setattr(sys, "argv", ["metrics_extraction.py", *format_args])
+    monkeypatch.setattr(
+        metrics_extraction, "get_working_directory_or_git_root", lambda: tmp_path
+    )
+
+    assert parse_args().output == tmp_path / "data" / output_name
+
+
+def test_output_can_be_given_for_any_format(monkeypatch):
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["metrics_extraction.py", "--output-format", "parquet", "--output", "out"],
+    )
+
+    assert parse_args().output == "out"
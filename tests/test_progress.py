@@ -0,0 +1,53 @@
+import pandas as pd
+
+from src.github_repo_request_local import load_progress, save_progress
+
+COLUMNS = ["clone_status", "testfilecountlocal", "last_commit_hash"]
+
+
+def create_df():
+    return pd.DataFrame(
+        {
+            "repourl": ["https://a.org/o/r", "https://b.org/o/r", "https://c.org/o/r"],
+            "clone_status": [None, None, None],
+            "testfilecountlocal": [-1, -1, -1],
+            "last_commit_hash": [None, None, None],
+        }
+    )
+
+
+def test_restores_the_saved_rows(tmp_path):
+    progress_path = tmp_path / "out.progress.jsonl"
+    df = create_df()
+    df.loc[0, COLUMNS] = ["successful", 3, "abc123"]
+    df.loc[2, COLUMNS] = ["failed", -1, None]
+    save_progress(progress_path, df, [0, 2], COLUMNS)
+
+    resumed_df = create_df()
+    assert load_progress(progress_path, resumed_df) == 2
+
+    assert resumed_df["clone_status"].tolist() == ["successful", None, "failed"]
+    assert resumed_df["testfilecountlocal"].tolist() == [3, -1, -1]
+    assert resumed_df.loc[0, "last_commit_hash"] == "abc123"
+    assert pd.isna(resumed_df.loc[2, "last_commit_hash"])
+
+
+def test_the_latest_progress_of_a_row_wins(tmp_path):
+    progress_path = tmp_path / "out.progress.jsonl"
+    df = create_df()
+    df.loc[1, COLUMNS] = ["failed", -1, None]
+    save_progress(progress_path, df, [1], COLUMNS)
+    df.loc[1, COLUMNS] = ["successful", 7, "def456"]
+    save_progress(progress_path, df, [1], COLUMNS)
+
+    resumed_df = create_df()
+    load_progress(progress_path, resumed_df)
+
+    assert resumed_df.loc[1, COLUMNS].tolist() == ["successful", 7, "def456"]
+
+
+def test_without_a_progress_file(tmp_path):
+    df = create_df()
+
+    assert load_progress(tmp_path / "missing.progress.jsonl", df) == 0
+    assert df.equals(create_df())
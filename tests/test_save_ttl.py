@@ -0,0 +1,26 @@
+import pandas as pd
+import pytest
+
+from src.github_repo_request_local import save_ttl
+from utils.export_to_rdf import REQUIRED_COLUMNS
+
+
+def test_saves_a_row_per_entry(tmp_path):
+    df = pd.DataFrame([{column: "value" for column in REQUIRED_COLUMNS}] * 2)
+    ttl_path = tmp_path / "all_data.ttl"
+
+    save_ttl(df, ttl_path)
+
+    assert ttl_path.read_text().count("ns1:value ns1:base_repo_url") == 2
+    assert list(tmp_path.iterdir()) == [ttl_path]
+
+
+def test_missing_columns_keep_the_existing_file(tmp_path):
+    ttl_path = tmp_path / "all_data.ttl"
+    ttl_path.write_text("earlier run\n")
+
+    with pytest.raises(ValueError):
+        save_ttl(pd.DataFrame({"projectref": ["value"]}), ttl_path)
+
+    assert ttl_path.read_text() == "earlier run\n"
+    assert list(tmp_path.iterdir()) == [ttl_path]
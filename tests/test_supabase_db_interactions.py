@@ -0,0 +1,76 @@
+import csv
+import io
+
+import pytest
+
+from src import supabase_db_interactions
+from src.supabase_db_interactions import read_from_db
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    """Returns the requested range of the file paths as postgrest does."""
+
+    def __init__(self, file_paths):
+        self.file_paths = file_paths
+        self.start = self.end = None
+
+    def table(self, name):
+        return self
+
+    def select(self, *columns):
+        return self
+
+    def order(self, column):
+        return self
+
+    def range(self, start, end):
+        self.start, self.end = start, end
+        return self
+
+    def csv(self):
+        return self
+
+    def execute(self):
+        page = self.file_paths[self.start : self.end + 1]
+        if not page:
+            # PostgREST returns an empty body, which postgrest reads as []
+            return FakeResponse([])
+        text = io.StringIO()
+        csv.writer(text).writerows([["file_path"], *([path] for path in page)])
+        return FakeResponse(text.getvalue())
+
+
+@pytest.fixture
+def read_page_size(monkeypatch):
+    monkeypatch.setenv("SUPABASE_OFFLINE", "0")
+    monkeypatch.setattr(supabase_db_interactions, "READ_PAGE_SIZE", 2)
+    return 2
+
+
+def use_file_paths(monkeypatch, file_paths):
+    monkeypatch.setattr(
+        supabase_db_interactions, "get_client", lambda: FakeQuery(file_paths)
+    )
+
+
+def test_reads_an_empty_table(monkeypatch, read_page_size):
+    use_file_paths(monkeypatch, [])
+
+    assert read_from_db() == set()
+
+
+def test_reads_full_pages_followed_by_an_empty_page(monkeypatch, read_page_size):
+    use_file_paths(monkeypatch, ["a.py", "b.py", "c.py", "d.py"])
+
+    assert read_from_db() == {"a.py", "b.py", "c.py", "d.py"}
+
+
+def test_reads_a_short_last_page(monkeypatch, read_page_size):
+    use_file_paths(monkeypatch, ["a.py", "b.py", "c,d.py"])
+
+    assert read_from_db() == {"a.py", "b.py", "c,d.py"}
@@ -1,3 +1,6 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
 from rdflib import Graph, Literal, URIRef, Namespace
 from rdflib.namespace import XSD
 from loguru import logger
@@ -29,6 +32,110 @@ REQUIRED_COLUMNS = [
 ]
 
 
+BASE_URI = "https://nlnet.nl/project/"
+
+# Number of rows sent to a worker process at a time when the rows are
+# converted in parallel
+ROWS_PER_TASK = 256
+
+# Fewer rows than this are always converted in this process, as starting the
+# worker processes would take longer than converting them
+PARALLEL_MIN_ROWS = 2000
+
+
+def row_to_ttl(index, row):
+    """
+    Converts a row of the DataFrame to Turtle (TTL) RDF format, logging and
+    skipping the row if it can't be converted.
+
+    This is a module-level function so that it can be run in a worker
+    process (see `iter_dataframe_ttl`).
+
+    Parameters:
+        index: The index label of the row, used when logging errors.
+        row (dict): The row's value for each of the REQUIRED_COLUMNS.
+
+    Returns:
+        str: The row in Turtle format, or None if it couldn't be converted.
+    """
+    project_namespace = Namespace(BASE_URI)
+    try:
+        graph = Graph()
+        subject_uri = URIRef(BASE_URI + str(row.get("projectref")))
+
+        # Create triples for all fields
+        for column in REQUIRED_COLUMNS:
+            value = row.get(column)
+            if value is not None and value != -1:  # Check for valid values
+                # Using column name as predicate
+                predicate = project_namespace[column]
+                if isinstance(value, str) and value.startswith("http"):
+                    graph.add(
+                        (subject_uri, predicate, URIRef(value))
+                    )  # Add as URIRef for URLs
+                else:
+                    graph.add(
+                        (
+                            subject_uri,
+                            predicate,
+                            Literal(value, datatype=XSD.string),
+                        )
+                    )
+
+        return graph.serialize(format="turtle")
+
+    except Exception as e:
+        logger.error(f"Skipping row {index} due to an error: {e}")
+        return None
+
+
+def iter_dataframe_ttl(df, max_workers=1):
+    """
+    Yields the Turtle (TTL) RDF format of each row of a pandas DataFrame,
+    including additional repository details, and logs issues encountered when
+    processing each row.
+
+    This is the generator behind `dataframe_to_ttl`: each row is converted
+    when the next string is requested, so the strings can be written out as
+    they are made rather than all being held in memory. The DataFrame must
+    include the columns listed in the REQUIRED_COLUMNS variable; if any are
+    missing a ValueError is raised when the first string is requested. Rows
+    with errors are logged and skipped.
+
+    Converting a row is mostly rdflib serialising its graph, which uses the
+    CPU, so with more than one worker and at least `PARALLEL_MIN_ROWS` rows,
+    the rows are converted in worker processes, `ROWS_PER_TASK` rows at a
+    time. The strings are still yielded in the order of the rows.
+
+    Parameters:
+        df (pd.DataFrame): The DataFrame to convert.
+        max_workers (int): The number of worker processes to convert the
+        rows in. With 1, the rows are converted in this process.
+    """
+    # Validate the presence of required columns
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f"DataFrame is missing required columns: {missing_columns}")
+
+    # Only the required columns are passed on, as plain dictionaries, which
+    # are quicker to build and to send to the worker processes than a
+    # Series for each row
+    rows = df[REQUIRED_COLUMNS].to_dict("records")
+
+    if max_workers == 1 or len(rows) < PARALLEL_MIN_ROWS:
+        ttl_strings = map(row_to_ttl, df.index, rows)
+        yield from (ttl for ttl in ttl_strings if ttl is not None)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        ttl_strings = executor.map(
+            row_to_ttl, df.index, rows, chunksize=ROWS_PER_TASK
+        )
+        yield from (ttl for ttl in ttl_strings if ttl is not None)
+
+
 def dataframe_to_ttl(df):
     """
     Converts a pandas DataFrame to Turtle (TTL) RDF format, including additional
@@ -41,42 +148,4 @@ def dataframe_to_ttl(df):
     function constructs an RDF graph, converts it to Turtle format, and appends
     the result to a list. Rows with errors are logged and skipped.
     """
-    # Validate the presence of required columns
-    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
-    if missing_columns:
-        raise ValueError(f"DataFrame is missing required columns: {missing_columns}")
-
-    ttl_strings = []
-    base_uri = "https://nlnet.nl/project/"
-    project_namespace = Namespace(base_uri)
-
-    for index, row in df.iterrows():
-        try:
-            graph = Graph()
-            subject_uri = URIRef(base_uri + str(row.get("projectref")))
-
-            # Create triples for all fields
-            for column in REQUIRED_COLUMNS:
-                value = row.get(column)
-                if value is not None and value != -1:  # Check for valid values
-                    # Using column name as predicate
-                    predicate = project_namespace[column]
-                    if isinstance(value, str) and value.startswith("http"):
-                        graph.add(
-                            (subject_uri, predicate, URIRef(value))
-                        )  # Add as URIRef for URLs
-                    else:
-                        graph.add(
-                            (
-                                subject_uri,
-                                predicate,
-                                Literal(value, datatype=XSD.string),
-                            )
-                        )
-
-            ttl_strings.append(graph.serialize(format="turtle"))
-
-        except Exception as e:
-            logger.error(f"Skipping row {index} due to an error: {e}")
-
-    return ttl_strings
+    return list(iter_dataframe_ttl(df))
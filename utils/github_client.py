@@ -0,0 +1,142 @@
+"""
+A client for the GitHub API that keeps within GitHub's rate limits.
+
+GitHub reports the state of the rate limit in the headers of every response
+(`X-RateLimit-Remaining` and `X-RateLimit-Reset`), and rejects requests that
+exceed the primary or secondary rate limits with a 403 or 429 response. The
+client tracks those headers, pauses until the limit resets when few requests
+remain, and retries rate limited requests with an exponential backoff.
+
+See: https://docs.github.com/en/rest/using-the-rest-api/rate-limits-for-the-rest-api
+"""
+
+import time
+
+from loguru import logger
+
+
+class GitHubClient:
+    """
+    Sends requests to the GitHub API through a session, handling rate limits.
+
+    Args:
+        session (requests.Session): The session used to send the requests,
+        e.g. with the authentication headers set on it.
+        min_remaining (int): When fewer requests than this remain, wait for
+        the rate limit to reset before sending the next one.
+        max_attempts (int): The maximum number of times to send a request that
+        is rate limited.
+        max_backoff (int): The longest time in seconds to back off for when
+        GitHub doesn't say how long to wait.
+    """
+
+    def __init__(self, session, min_remaining=50, max_attempts=10, max_backoff=300):
+        self.session = session
+        self.min_remaining = min_remaining
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self.remaining = None
+        self.reset_at = None
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        """
+        Sends a request, retrying it while it is rate limited.
+
+        Args:
+            method (str): The HTTP method, e.g. 'GET'.
+            url (str): The URL to request.
+            **kwargs: Passed on to `session.request`.
+
+        Returns:
+            requests.Response: The response, which is the last rate limited
+            response if every attempt was rate limited.
+        """
+        for attempt_num in range(1, self.max_attempts + 1):
+            self.wait_for_rate_limit_reset()
+            response = self.session.request(method, url, **kwargs)
+            self.update_rate_limit(response)
+
+            if not self.is_rate_limited(response):
+                return response
+
+            time_to_pause = self.get_time_to_pause(response, attempt_num)
+            logger.warning(
+                f"Rate limited (status code {response.status_code}) on attempt "
+                f"{attempt_num} for {url}. Sleeping for {time_to_pause:.0f} "
+                f"seconds."
+            )
+            time.sleep(time_to_pause)
+
+        logger.error(f"Reached max attempt count of {self.max_attempts} for {url}.")
+        return response
+
+    def update_rate_limit(self, response):
+        """
+        Records the rate limit reported in the headers of a response.
+
+        Responses served from a local cache (see `requests_cache`) carry the
+        headers of when they were first fetched, so they are ignored.
+        """
+        if getattr(response, "from_cache", False):
+            return
+
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset_at = response.headers.get("X-RateLimit-Reset")
+        if remaining is not None:
+            self.remaining = int(remaining)
+        if reset_at is not None:
+            self.reset_at = int(reset_at)
+
+    def wait_for_rate_limit_reset(self):
+        """
+        Sleeps until the rate limit resets if fewer than `min_remaining`
+        requests remain.
+        """
+        if self.remaining is None or self.reset_at is None:
+            return
+        if self.remaining >= self.min_remaining:
+            return
+
+        time_to_pause = self.reset_at - time.time()
+        if time_to_pause > 0:
+            logger.info(
+                f"Only {self.remaining} requests remain in the rate limit. "
+                f"Sleeping for {time_to_pause:.0f} seconds until it resets."
+            )
+            time.sleep(time_to_pause)
+        # The limit has reset, so the count is no longer known
+        self.remaining = None
+
+    def is_rate_limited(self, response):
+        """
+        Checks whether a response is GitHub rejecting a request for exceeding
+        the primary or secondary rate limit.
+        """
+        if response.status_code == 429:
+            return True
+        if response.status_code == 403:
+            return self.remaining == 0 or "rate limit" in response.text.lower()
+        return False
+
+    def get_time_to_pause(self, response, attempt_num):
+        """
+        Works out how long to wait before retrying a rate limited request.
+
+        GitHub's `Retry-After` header is used when present, then the time the
+        rate limit resets if it has been used up. Otherwise the wait doubles
+        with each attempt, up to `max_backoff` seconds.
+        """
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            return float(retry_after)
+
+        if self.remaining == 0 and self.reset_at is not None:
+            return max(self.reset_at - time.time(), 0) + 1
+
+        return min(2**attempt_num, self.max_backoff)
@@ -48,6 +48,20 @@ from urllib.parse import urlparse
 # Constants for URL validation
 EXPECTED_URL_PARTS = 5
 
+# Platforms that use the complete path without slicing
+DIRECT_PATH_PLATFORMS = frozenset(
+    {
+        "gitlab.com",
+        "gitlab.torproject.org",
+        "codeberg.org",
+        "framagit.org",
+        "hydrillabugs.koszko.org",
+        "git.replicant.us",
+        "gerrit.osmocom.org",
+        "git.taler.net",
+    }
+)
+
 
 def parse_args():
     """
@@ -199,10 +213,14 @@ def mark_incomplete_urls(df):
 
     # Check for successful domain extraction
     # Apply the incomplete URL flag condition on non-duplicate and unsuccessful
-    # domain extraction rows
-    df["incomplete_url_flag"] = ~df.loc[
-        non_duplicate_rows & domain_extraction_successful, "repourl"
-    ].apply(is_complete_url)
+    # domain extraction rows. As in `is_complete_url`, a URL is complete if it
+    # has at least EXPECTED_URL_PARTS parts, i.e. one fewer "/"s; the "/"s are
+    # counted for the whole column at once rather than splitting each URL.
+    # Values that aren't strings have no parts.
+    repourls = df.loc[non_duplicate_rows & domain_extraction_successful, "repourl"]
+    is_string = repourls.map(type).eq(str)
+    slash_counts = repourls.where(is_string, "").astype(str).str.count("/")
+    df["incomplete_url_flag"] = slash_counts.lt(EXPECTED_URL_PARTS - 1)
     df["incomplete_url_flag"] = df["incomplete_url_flag"].astype(bool)
     incomplete_count = df["incomplete_url_flag"].sum()
     logger.info(f"Found {incomplete_count} incomplete " f"URLs.")
@@ -222,20 +240,8 @@ def extract_url(url):
 
     parts = path.split("/")
 
-    # Define platforms that use the complete path without slicing
-    direct_path_platforms = {
-        "gitlab.com",
-        "gitlab.torproject.org",
-        "codeberg.org",
-        "framagit.org",
-        "hydrillabugs.koszko.org",
-        "git.replicant.us",
-        "gerrit.osmocom.org",
-        "git.taler.net",
-    }
-
     # Determine the base path based on the hosting platform
-    if any(host in parsed_url.netloc for host in direct_path_platforms):
+    if any(host in parsed_url.netloc for host in DIRECT_PATH_PLATFORMS):
         base_path = path  # Use the whole path for these platforms
     elif len(parts) < 2:
         return None, True  # URL lacks sufficient parts, flag as unsuccessful
@@ -270,38 +276,6 @@ def get_base_repo_url(df):
     if df.empty:
         return None
 
-    def extract_url(url):
-        if not url:
-            return None, True  # Return None for URL, True for unsuccessful flag
-
-        parsed_url = urlparse(url)
-        # Strip leading '/' to avoid the first empty string in the list
-        path = parsed_url.path.strip("/")
-
-        parts = path.split("/")
-
-        # Define platforms that use the complete path without slicing
-        direct_path_platforms = {
-            "gitlab.com",
-            "gitlab.torproject.org",
-            "codeberg.org",
-            "framagit.org",
-            "hydrillabugs.koszko.org",
-            "git.replicant.us",
-            "gerrit.osmocom.org",
-            "git.taler.net",
-        }
-
-        # Determine the base path based on the hosting platform
-        if any(host in parsed_url.netloc for host in direct_path_platforms):
-            base_path = path  # Use the whole path for these platforms
-        elif len(parts) < 2:
-            return None, True  # URL lacks sufficient parts, flag as unsuccessful
-        else:
-            base_path = "/".join(parts[:2])  # Standard handling for most URLs
-
-        return f"{parsed_url.scheme}://{parsed_url.netloc}/{base_path}", False
-
     # Filter DataFrame based on specified conditions
     filtered_rows = (
         ~df["duplicate_flag"]